@@ -1,15 +1,25 @@
 import os
 import gspread
 import logging
-from retry import retry
+from functools import wraps
+from retry.api import retry_call
 from argparse import ArgumentParser
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from module.file_operation import read_json
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator
 from arrow.arrow import Arrow
-from conftest import (
+from module.testsuite_config import (
     TestsuiteConfig,
     load_testsuite_config
 )
+from module.report.journal import UploadJournal
+from module.report.result import TestResultObject
+from module.report.sinks import (
+    LOCAL_SINKS,
+    ResultSink
+)
 from dataclasses import (
     dataclass,
     field
@@ -19,31 +29,59 @@ from dataclasses import (
 GCLOUD_CRED = os.environ.get('GCLOUD_AUTH_PATH')
 SPREADSHEET_ID = os.environ.get('SHEET_ID')
 ROW_DATA_WORKSHEET = 'test_result_raw'
+TAGS_WORKSHEET = 'testcase_with_tags'
+SEVERITY_WORKSHEET = 'testcase_with_severity'
+# retry of Sheets API errors, tries can be lowered from the command line
+# since an interrupted upload resumes from the journal
+SHEET_API_RETRY = {'tries': 60, 'delay': 2, 'max_delay': 60, 'backoff': 2, 'jitter': 0}
+
+
+def sheet_api_retry(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return retry_call(func, fargs=args, fkwargs=kwargs,
+                          exceptions=gspread.exceptions.APIError, logger=logging, **SHEET_API_RETRY)
+    return wrapper
 
 
 @dataclass
-class TestResultObject:
-    name: str = None
-    status: str = None
-    start_time: int = None
-    end_time: int = 0
-    duration: int = 0
-    uuid: str = None
-    testcase_id: str = None
-    full_testcase_name: str = None
-    severity: str = None
-    tags: List[str] = field(default_factory=list)
-    parent_suite: str = None
-    suite: str = None
-    subsuite: str = None
-    host: str = None
-    framework: str = None
-    package: str = None
-    execution_time: int = 0
+class SeverityIndex:
+    """Local copy of the testcase_with_severity sheet keyed by testcase_id.
+
+    Read once per run, so finding a testcase is a dict hit instead of a
+    remote scan over the whole sheet.
+    """
+    # testcase_id -> [sheet row number, severity]
+    rows: Dict[str, list] = field(default_factory=dict)
+
+    @classmethod
+    def from_columns(cls, id_column: List[list], severity_column: List[list]) -> 'SeverityIndex':
+        index = cls()
+        for row_number, id_cell in enumerate(id_column, start=1):
+            if not id_cell or not id_cell[0]:
+                continue
+            severity_cell = severity_column[row_number - 1] if row_number <= len(severity_column) else None
+            index.rows[id_cell[0]] = [row_number, severity_cell[0] if severity_cell else None]
+        return index
+
+    def diff(self, record_objs: List[TestResultObject]):
+        """Split results into (changed, new) compared with the sheet."""
+        changed: List[tuple] = []
+        new: List[TestResultObject] = []
+        for obj in record_objs:
+            row = self.rows.get(obj.testcase_id)
+            if row is None:
+                new.append(obj)
+            elif row[1] != obj.severity:
+                changed.append((row[0], obj))
+        return changed, new
+
+    def set(self, testcase_id: str, row_number: int, severity: str):
+        self.rows[testcase_id] = [row_number, severity]
 
 
 @dataclass
-class GoogleSheetManager(object):
+class GoogleSheetManager(ResultSink):
     # If modifying these scopes, delete the file token.json.
     _SCOPES = ['https://www.googleapis.com/auth/spreadsheets',
                'https://www.googleapis.com/auth/drive.file',
@@ -51,19 +89,142 @@ class GoogleSheetManager(object):
     _sheet: gspread.Spreadsheet = None
     _spreadsheet_id: str = ''
     _current_ts = Arrow.now().int_timestamp
+    name = 'gsheet'
 
-    def __init__(self, auth_path: str, spreadsheet_id: str) -> None:
+    def __init__(self, auth_path: str, spreadsheet_id: str,
+                 journal: UploadJournal = None, batch_size: int = 500) -> None:
         self._spreadsheet_id = spreadsheet_id
+        self.journal = journal
+        self.batch_size = batch_size
+        self.api_calls = Counter()
+        self._worksheets: Dict[str, gspread.Worksheet] = {}
+        # rows waiting for flush()
+        self._pending_tag_rows: List[list] = []
+        self._pending_severities: Dict[str, TestResultObject] = {}
+        self._severity_index: Optional[SeverityIndex] = None
         gc = gspread.service_account(filename=auth_path, scopes=self._SCOPES)
+        self._count_api_call('open_by_key')
         self._sheet = gc.open_by_key(spreadsheet_id)
 
         pass
 
-    @retry(exceptions=gspread.exceptions.APIError, tries=60, delay=2, max_delay=60, backoff=2, jitter=0, logger=logging)
+    def write_results(self, config: TestsuiteConfig, result_objs: List[TestResultObject]) -> None:
+        upload_results(self, self.journal, config, result_objs, batch_size=self.batch_size)
+
+    def close(self) -> None:
+        print(f'google sheet api calls: {self.api_call_report()}')
+
+    def _count_api_call(self, name: str):
+        self.api_calls[name] += 1
+
+    def _worksheet(self, worksheet_name: str) -> gspread.Worksheet:
+        work_sheet = self._worksheets.get(worksheet_name)
+        if work_sheet is None:
+            self._count_api_call('worksheet')
+            work_sheet = self._sheet.worksheet(worksheet_name)
+            self._worksheets[worksheet_name] = work_sheet
+        return work_sheet
+
+    def api_call_report(self) -> Dict[str, int]:
+        report = dict(self.api_calls)
+        report['total'] = sum(self.api_calls.values())
+        return report
+
+    def _tag_rows(self, record_obj: TestResultObject) -> List[list]:
+        # testcase_id	package	testcase_name	tag	updated_ts
+        return [
+            [
+                record_obj.testcase_id,
+                record_obj.package,
+                record_obj.name,
+                tag,
+                self._current_ts
+            ]
+            for tag in record_obj.tags
+        ]
+
+    def queue_tc_tag(self, record_obj: TestResultObject):
+        self._pending_tag_rows.extend(self._tag_rows(record_obj))
+
+    def queue_severity(self, record_obj: TestResultObject):
+        # the last result of a testcase wins, same as calling update_severity in order
+        self._pending_severities[record_obj.testcase_id] = record_obj
+
+    def flush(self):
+        self.flush_tc_tags()
+        self.flush_severities()
+
+    @sheet_api_retry
+    def flush_tc_tags(self):
+        if not self._pending_tag_rows:
+            return
+        work_sheet = self._worksheet(TAGS_WORKSHEET)
+        self._count_api_call('append_rows')
+        response = work_sheet.append_rows(values=self._pending_tag_rows)
+        print(response)
+        self._pending_tag_rows = []
+
+    @sheet_api_retry
+    def flush_severities(self):
+        if not self._pending_severities:
+            return
+        work_sheet = self._worksheet(SEVERITY_WORKSHEET)
+        index = self.get_severity_index()
+        changed, new = index.diff(list(self._pending_severities.values()))
+
+        # testcase_id	package	testcase_name	severity	updated_ts
+        if changed:
+            self._count_api_call('batch_update')
+            work_sheet.batch_update([
+                {
+                    'range': f'D{row_number}:E{row_number}',
+                    'values': [[obj.severity, self._current_ts]]
+                }
+                for row_number, obj in changed
+            ])
+            for row_number, obj in changed:
+                index.set(obj.testcase_id, row_number, obj.severity)
+        if new:
+            # Append New Row for Severity
+            self._count_api_call('append_rows')
+            response = work_sheet.append_rows(values=[
+                [
+                    obj.testcase_id,
+                    obj.package,
+                    obj.name,
+                    obj.severity,
+                    self._current_ts
+                ]
+                for obj in new
+            ])
+            self._index_appended_rows(response, new)
+        self._pending_severities = {}
+
+    def get_severity_index(self) -> SeverityIndex:
+        if self._severity_index is None:
+            work_sheet = self._worksheet(SEVERITY_WORKSHEET)
+            self._count_api_call('batch_get')
+            id_column, severity_column = work_sheet.batch_get(['A:A', 'D:D'])
+            self._severity_index = SeverityIndex.from_columns(id_column, severity_column)
+        return self._severity_index
+
+    def _index_appended_rows(self, response: Optional[Dict], record_objs: List[TestResultObject]):
+        # append_rows reports where the rows landed, eg. 'testcase_with_severity'!A120:E125
+        try:
+            updated_range = response['updates']['updatedRange'].split('!')[-1]
+            first_row, _ = gspread.utils.a1_to_rowcol(updated_range.split(':')[0])
+        except (KeyError, TypeError, IndexError, gspread.exceptions.IncorrectCellLabel):
+            # unknown position, read the sheet again next time
+            self._severity_index = None
+            return
+        for offset, obj in enumerate(record_objs):
+            self._severity_index.set(obj.testcase_id, first_row + offset, obj.severity)
+
+    @sheet_api_retry
     def insert_test_result_rows(self, record_objs: List[TestResultObject]):
-        worksheet_name = 'test_result_raw'
+        worksheet_name = ROW_DATA_WORKSHEET
         range = 'A:L'
-        test_results_sht = self._sheet.worksheet(worksheet_name)
+        test_results_sht = self._worksheet(worksheet_name)
         # cols: [tc_id	tc_name	package	filename	class	status	start_time	end_time	duration	execution_time	severity	host]
         rows = []
         for obj in record_objs:
@@ -83,6 +244,7 @@ class GoogleSheetManager(object):
             ]
             rows.append(row)
 
+        self._count_api_call('append_rows')
         response = test_results_sht.append_rows(
             values=rows,
             table_range=range
@@ -91,68 +253,40 @@ class GoogleSheetManager(object):
         print(response)
         pass
 
-    @retry(exceptions=gspread.exceptions.APIError, tries=60, delay=2, max_delay=60, backoff=2, jitter=0, logger=logging)
+    @sheet_api_retry
     def insert_tc_tag(self, record_obj: TestResultObject):
-        worksheet_name = 'testcase_with_tags'
-        work_sheet = self._sheet.worksheet(worksheet_name)
-        # testcase_id	package	testcase_name	tag	updated_ts
-        rows = []
-        for tag in record_obj.tags:
-            row = [
-                record_obj.testcase_id,
-                record_obj.package,
-                record_obj.name,
-                tag,
-                self._current_ts
-            ]
-            rows.append(row)
+        worksheet_name = TAGS_WORKSHEET
+        work_sheet = self._worksheet(worksheet_name)
+        rows = self._tag_rows(record_obj)
 
+        self._count_api_call('append_rows')
         response = work_sheet.append_rows(
             values=rows
         )
         print(response)
         pass
 
-    @retry(exceptions=gspread.exceptions.APIError, tries=60, delay=2, max_delay=60, backoff=2, jitter=0, logger=logging)
     def update_severity(self, record_obj: TestResultObject):
-        worksheet_name = 'testcase_with_severity'
-        work_sheet = self._sheet.worksheet(worksheet_name)
-        # testcase_id	package	testcase_name	severity	updated_ts
-        cell: gspread.cell.Cell = work_sheet.find(
-            record_obj.testcase_id, in_column=1)
-
-        if cell:
-            if work_sheet.cell(cell.row, 4).value != record_obj.severity:
-                work_sheet.update_cell(cell.row, 4, record_obj.severity)
-                work_sheet.update_cell(cell.row, 5, self._current_ts)
-        else:
-            # Append New Row for Severity
-            work_sheet.append_row(
-                [
-                    record_obj.testcase_id,
-                    record_obj.package,
-                    record_obj.name,
-                    record_obj.severity,
-                    self._current_ts
-                ]
-            )
-        pass
+        self.queue_severity(record_obj)
+        self.flush_severities()
 
-    @retry(exceptions=gspread.exceptions.APIError, tries=60, delay=2, max_delay=60, backoff=2, jitter=0, logger=logging)
+    @sheet_api_retry
     def find_rows_by_value(self, sheet_name: str, value: Any = None) -> List[gspread.Cell]:
-        work_sheet = self._sheet.worksheet(sheet_name)
+        work_sheet = self._worksheet(sheet_name)
+        self._count_api_call('findall')
         cell_list = work_sheet.findall(value)
         return cell_list
 
-    @retry(exceptions=gspread.exceptions.APIError, tries=60, delay=2, max_delay=60, backoff=2, jitter=0, logger=logging)
+    @sheet_api_retry
     def delete_row_by_index(self, sheet_name: str, row_index: int):
-        work_sheet = self._sheet.worksheet(sheet_name)
-        work_sheet.delete_row(row_index)
+        work_sheet = self._worksheet(sheet_name)
+        self._count_api_call('delete_rows')
+        work_sheet.delete_rows(row_index)
 
-    @retry(exceptions=gspread.exceptions.APIError, tries=60, delay=2, max_delay=60, backoff=2, jitter=0, logger=logging)
+    @sheet_api_retry
     def insert_suite_execution_status(self, record_objs: List[TestResultObject]):
         worksheet_name = 'suite_execution_status'
-        work_sheet = self._sheet.worksheet(worksheet_name)
+        work_sheet = self._worksheet(worksheet_name)
         class_name = ''
         num_pass = 0
         num_fail = 0
@@ -172,6 +306,7 @@ class GoogleSheetManager(object):
             elif obj.status == 'unknown':
                 num_unknown += 1
 
+        self._count_api_call('append_row')
         response = work_sheet.append_row(
             values=[
                 class_name,
@@ -186,10 +321,10 @@ class GoogleSheetManager(object):
         )
         print(response)
 
-    @retry(exceptions=gspread.exceptions.APIError, tries=60, delay=2, max_delay=60, backoff=2, jitter=0, logger=logging)
+    @sheet_api_retry
     def insert_war_map(self, config: TestsuiteConfig, result_objs: List[TestResultObject]):
         worksheet_name = 'coverage_map'
-        work_sheet = self._sheet.worksheet(worksheet_name)
+        work_sheet = self._worksheet(worksheet_name)
 
         passed_count = 0
         failed_count = 0
@@ -209,6 +344,7 @@ class GoogleSheetManager(object):
             passed_count + failed_count,
             self._current_ts
         ]
+        self._count_api_call('append_row')
         work_sheet.append_row(row)
 
 
@@ -218,92 +354,221 @@ def get_arguments() -> Optional[Dict]:
                         help='set report path', default="report/allure")
     parser.add_argument("--testsuite_config", dest='testsuite_config', action='store',
                         help='testsuite_config', default=None)
+    parser.add_argument("--workers", dest='workers', action='store', type=int,
+                        help='number of result parsing workers, 1 parses in this process', default=os.cpu_count())
+    parser.add_argument("--executor", dest='executor', action='store', choices=['process', 'thread'],
+                        help='pool type used to parse result files', default='process')
+    parser.add_argument("--journal", dest='journal', action='store',
+                        help='path of the upload journal used to resume interrupted uploads',
+                        default="reports/upload_journal.sqlite")
+    parser.add_argument("--batch_size", dest='batch_size', action='store', type=int,
+                        help='results uploaded and acknowledged per batch', default=500)
+    parser.add_argument("--sink", dest='sinks', action='append',
+                        help='where results are written, repeatable: gsheet, sqlite[:path], jsonl[:path], csv[:path]')
+    parser.add_argument("--max_tries", dest='max_tries', action='store', type=int,
+                        help='tries of a failing Sheets API call before giving up', default=5)
     args_obj = parser.parse_args()
     args = {
         'report_path': args_obj.report_path,
-        'testsuite_config': args_obj.testsuite_config
+        'testsuite_config': args_obj.testsuite_config,
+        'workers': args_obj.workers,
+        'executor': args_obj.executor,
+        'journal': args_obj.journal,
+        'batch_size': args_obj.batch_size,
+        'max_tries': args_obj.max_tries,
+        'sinks': args_obj.sinks or [GoogleSheetManager.name]
     }
     return args
 
 
-def get_result_files(_report_path: str) -> List[str]:
-    files = []
+def iter_result_files(_report_path: str) -> Iterator[str]:
     root_path = f'{os.path.dirname(os.path.realpath(__file__))}/{_report_path}'
-    for file in os.listdir(root_path):
-        if file.endswith('result.json'):
-            files.append(os.path.join(root_path, file))
-    return files
+    with os.scandir(root_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('result.json'):
+                yield entry.path
 
 
-def get_testcase_result(filepath: str) -> TestResultObject:
-    result_json = read_json(filepath)
-    result = TestResultObject()
-    result.name = result_json['name']
-    result.status = result_json['status']
-    result.start_time = result_json['start']
-    result.end_time = result_json['stop']
-    result.duration = result_json['stop'] - result_json['start']
-    result.uuid = result_json['uuid']
-    result.testcase_id = result_json['testCaseId']
-    result.full_testcase_name = result_json['fullName']
-    result.execution_time = Arrow.now().int_timestamp * 1000
+def get_result_files(_report_path: str) -> List[str]:
+    return list(iter_result_files(_report_path))
+
+
+# allure label name -> TestResultObject attribute, tags are collected separately
+_LABEL_FIELDS = {
+    'severity': 'severity',
+    'parentSuite': 'parent_suite',
+    'suite': 'suite',
+    'subSuite': 'subsuite',
+    'host': 'host',
+    'package': 'package',
+    'framework': 'framework'
+}
+
+
+def parse_testcase_result(result_json: Dict) -> TestResultObject:
+    result = TestResultObject(
+        name=result_json['name'],
+        status=result_json['status'],
+        start_time=result_json['start'],
+        end_time=result_json['stop'],
+        duration=result_json['stop'] - result_json['start'],
+        uuid=result_json['uuid'],
+        testcase_id=result_json['testCaseId'],
+        full_testcase_name=result_json['fullName'],
+        execution_time=Arrow.now().int_timestamp * 1000
+    )
     for label in result_json['labels']:
-        k, v = label['name'], label['value']
-        if k == 'severity':
-            result.severity = v
-            continue
+        k = label['name']
         if k == 'tag':
-            result.tags.append(v)
-            continue
-        if k == 'parentSuite':
-            result.parent_suite = v
-            continue
-        if k == 'parentSuite':
-            result.parent_suite = v
-            continue
-        if k == 'suite':
-            result.suite = v
-            continue
-        if k == 'suite':
-            result.suite = v
-            continue
-        if k == 'subSuite':
-            result.subsuite = v
-            continue
-        if k == 'host':
-            result.host = v
-            continue
-        if k == 'package':
-            result.package = v
+            result.tags.append(label['value'])
             continue
+        attr = _LABEL_FIELDS.get(k)
+        if attr:
+            setattr(result, attr, label['value'])
     return result
 
 
-if __name__ == "__main__":
-    args = get_arguments()
-    files = get_result_files(args['report_path'])
-    testsuite_config = load_testsuite_config(args['testsuite_config'])
+def get_testcase_result(filepath: str) -> TestResultObject:
+    return parse_testcase_result(read_json(filepath))
+
+
+def _parse_result_batch(filepaths: List[str]) -> List[TestResultObject]:
+    return [get_testcase_result(filepath) for filepath in filepaths]
+
+
+def iter_testcase_results(files: Iterable[str], workers: int = 1, executor: str = 'process',
+                          batch_size: int = 256) -> Iterator[TestResultObject]:
+    """Parse allure result files with a pool of workers, yielding results in file order.
+
+    Files are handed to the pool in batches and at most `workers * 2` batches
+    are in flight, so memory stays bounded however many files there are.
+    Args:
+        files: result file paths, eg. iter_result_files('reports/allure')
+        workers: pool size, 1 parses in the current process
+        executor: 'process' for CPU bound parsing, 'thread' when the disk is the bottleneck
+        batch_size: files parsed per pool task
+    """
+    if workers is None or workers <= 1:
+        for filepath in files:
+            yield get_testcase_result(filepath)
+        return
+
+    pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    file_iter = iter(files)
+    with pool_class(max_workers=workers) as pool:
+        in_flight = deque()
+        while True:
+            while len(in_flight) < workers * 2:
+                batch = list(islice(file_iter, batch_size))
+                if not batch:
+                    break
+                in_flight.append(pool.submit(_parse_result_batch, batch))
+            if not in_flight:
+                break
+            yield from in_flight.popleft().result()
+
+
+def apply_testsuite_config(result_objs: List[TestResultObject], config: TestsuiteConfig):
+    # fill severity and tags allure did not record from the indexed testsuite config
+    for obj in result_objs:
+        testcase_obj = config.get_testcase(obj.name) or config.get_testcase(obj.name.split('[')[0])
+        if testcase_obj is None:
+            continue
+        if not obj.severity:
+            obj.severity = testcase_obj.severity
+        if not obj.tags:
+            obj.tags = list(testcase_obj.tags)
 
-    sheet_manager = GoogleSheetManager(
-        auth_path=GCLOUD_CRED,
-        spreadsheet_id=SPREADSHEET_ID
-    )
-    test_results: List[TestResultObject] = []
-    for f in files:
-        test_results.append(get_testcase_result(f))
+
+def get_run_timestamp(result_objs: List[TestResultObject]) -> int:
+    # the earliest start identifies a run, it stays the same when the upload is rerun
+    return min((obj.start_time for obj in result_objs if obj.start_time), default=0)
+
+
+def upload_results(sheet_manager: GoogleSheetManager, journal: UploadJournal, config: TestsuiteConfig,
+                   result_objs: List[TestResultObject], batch_size: int = 500):
+    """Upload a run step by step, skipping whatever the journal already acknowledged.
+
+    Result rows, tags and severities go out in batches which are acknowledged
+    one by one, so a failure resumes from the first unacknowledged batch.
+    """
+    results_by_uuid = {obj.uuid: obj for obj in result_objs}
+
+    def pending_batches(step: str):
+        pending = journal.pending(step, results_by_uuid)
+        for i in range(0, len(pending), batch_size):
+            yield [results_by_uuid[key] for key in pending[i:i + batch_size]]
 
     # Update Record
-    sheet_manager.insert_test_result_rows(test_results)
+    for batch in pending_batches(ROW_DATA_WORKSHEET):
+        sheet_manager.insert_test_result_rows(batch)
+        journal.ack(ROW_DATA_WORKSHEET, [obj.uuid for obj in batch])
     # Append Suite Execution Status
-    sheet_manager.insert_suite_execution_status(test_results)
+    if not journal.is_done('suite_execution_status'):
+        sheet_manager.insert_suite_execution_status(result_objs)
+        journal.ack('suite_execution_status')
     # Insert Tags
-    for test_obj in test_results:
-        # Append New Tag
-        sheet_manager.insert_tc_tag(test_obj)
-        # Update Severity
-        sheet_manager.update_severity(test_obj)
-
+    for batch in pending_batches(TAGS_WORKSHEET):
+        for test_obj in batch:
+            # Append New Tag
+            sheet_manager.queue_tc_tag(test_obj)
+        sheet_manager.flush_tc_tags()
+        journal.ack(TAGS_WORKSHEET, [obj.uuid for obj in batch])
+    # Update Severity
+    for batch in pending_batches(SEVERITY_WORKSHEET):
+        for test_obj in batch:
+            sheet_manager.queue_severity(test_obj)
+        sheet_manager.flush_severities()
+        journal.ack(SEVERITY_WORKSHEET, [obj.uuid for obj in batch])
     # Update Coverage Map
-    sheet_manager.insert_war_map(testsuite_config, test_results)
+    if not journal.is_done('coverage_map'):
+        sheet_manager.insert_war_map(config, result_objs)
+        journal.ack('coverage_map')
+
+
+def get_sink(spec: str, journal: UploadJournal, batch_size: int = 500) -> ResultSink:
+    # spec is <sink name>[:<path>], eg. sqlite:reports/history.sqlite
+    name, _, path = spec.partition(':')
+    if name == GoogleSheetManager.name:
+        return GoogleSheetManager(
+            auth_path=GCLOUD_CRED,
+            spreadsheet_id=SPREADSHEET_ID,
+            journal=journal,
+            batch_size=batch_size
+        )
+    if name not in LOCAL_SINKS:
+        raise ValueError(f'unknown sink {name}, expect one of {[GoogleSheetManager.name, *LOCAL_SINKS]}')
+    sink_class = LOCAL_SINKS[name]
+    return sink_class(path or sink_class.default_path)
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+    SHEET_API_RETRY['tries'] = args['max_tries']
+    files = iter_result_files(args['report_path'])
+    testsuite_config = load_testsuite_config(args['testsuite_config'])
 
+    test_results: List[TestResultObject] = list(iter_testcase_results(
+        files, workers=args['workers'], executor=args['executor']))
+    # xdist workers write their result files interleaved, upload in execution order
+    test_results.sort(key=lambda obj: (obj.start_time or 0, obj.full_testcase_name or ''))
+    apply_testsuite_config(test_results, testsuite_config)
+
+    journal = UploadJournal(args['journal'], run_ts=get_run_timestamp(test_results))
+    try:
+        for spec in args['sinks']:
+            sink = get_sink(spec, journal, batch_size=args['batch_size'])
+            # Google Sheets acknowledges each batch itself, local sinks once per run
+            step = f'sink:{spec}'
+            if sink.name != GoogleSheetManager.name and journal.is_done(step):
+                sink.close()
+                continue
+            try:
+                sink.write_results(testsuite_config, test_results)
+                if sink.name != GoogleSheetManager.name:
+                    journal.ack(step)
+            finally:
+                sink.close()
+    finally:
+        journal.close()
     pass
@@ -0,0 +1,239 @@
+"""Time the framework adds on top of a plain requests call.
+
+Usage: python -m benchmarks.bench_framework_overhead [--requests 2000] [--output reports/bench_framework_overhead.json]
+       python -m benchmarks.bench_framework_overhead --compare reports/bench_framework_overhead.json
+
+Runs against the bundled StubServer, so the numbers do not depend on network:
+  * components: session creation, ResponseObject construction, the response
+    log block (banner, structured and sampled 1 in 10), get_testdata_parameters
+    and an assertion helper, in us per call
+  * send_request per payload size: latency next to a bare requests.Session,
+    the difference is the framework overhead, plus req/s and memory per response
+  * pytest --collect-only and Settings session setup, in ms
+
+Results are written as json (with the commit they were measured on) and
+--compare prints the relative change of every metric against an earlier file.
+"""
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Callable, Dict
+import requests
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from module.base.base_request import Base, BaseAssertion
+from module.base.request_log import RequestLog, RequestLogMode
+from module.base.session_pool import SessionPool
+from module.histogram import LatencyHistogram
+from module.login.login import Login
+from module.settings import Settings
+from module.stub_server import StubRoute, StubServer
+
+PAYLOAD_SIZES = {'1kb': 1024, '64kb': 64 * 1024, '1mb': 1024 * 1024}
+RETAINED_RESPONSES = 50
+
+
+def json_body(size: int) -> bytes:
+    record = b'{"id": 1, "name": "user_name", "tags": ["a", "b", "c"], "score": 99.5}'
+    count = max(size // (len(record) + 1), 1)
+    return b'[' + b','.join([record] * count) + b']'
+
+
+def build_response(body: bytes) -> Response:
+    response = Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+    response.encoding = 'utf-8'
+    response.url = 'http://localhost/bench'
+    response._content = body
+    return response
+
+
+def per_call_us(func: Callable, rounds: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def bench_components(rounds: int) -> Dict[str, float]:
+    pool = SessionPool()
+    controller = Base()
+    body = json_body(1024)
+    res_obj = Base.ResponseObject(build_response(body))
+
+    settings = Settings(env='STG', test_data='login')
+    login = Login(settings.environment, settings.test_data)
+    os.environ['PYTEST_CURRENT_TEST'] = 'testsuite/login/test_login.py::TestLogin::test_git_user_info (call)'
+
+    # log the way pytest log_cli does, into a sink instead of the terminal
+    handler = logging.StreamHandler(open(os.devnull, 'w'))
+    handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)8s] %(message)s (%(filename)s:%(lineno)s)'))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+    def structured_log_us(sample: int) -> float:
+        structured = Base()
+        structured.request_log = RequestLog(RequestLogMode.STRUCTURED, sample=sample, use_queue=True)
+        try:
+            return per_call_us(lambda: structured._log_response(res_obj, {'key': 'value'}, 'GET'), rounds)
+        finally:
+            structured.request_log.stop()
+
+    try:
+        return {
+            'session_creation_us': per_call_us(lambda: pool._new_session().close(), rounds // 10),
+            'response_object_us': per_call_us(lambda: Base.ResponseObject(build_response(body)).status_code, rounds),
+            'log_response_us': per_call_us(lambda: controller._log_response(res_obj, {'key': 'value'}), rounds),
+            'log_response_structured_us': structured_log_us(1),
+            'log_response_sampled_us': structured_log_us(10),
+            'get_testdata_parameters_us': per_call_us(lambda: login.get_testdata_parameters('expect'), rounds),
+            'verify_general_response_code_us': per_call_us(
+                lambda: BaseAssertion.verify_general_response_code(res_obj), rounds)
+        }
+    finally:
+        root.removeHandler(handler)
+        handler.stream.close()
+        settings.teardown()
+
+
+def latency(func: Callable, requests_count: int) -> Dict[str, float]:
+    histogram = LatencyHistogram()
+    func()
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        request_start = time.perf_counter()
+        func()
+        histogram.record((time.perf_counter() - request_start) * 1000)
+    elapsed = time.perf_counter() - start
+    summary = histogram.summary()
+    return {'mean_ms': summary['mean'], 'p50_ms': summary['p50'], 'p99_ms': summary['p99'],
+            'rps': requests_count / elapsed}
+
+
+def retained_bytes(func: Callable) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    responses = [func() for _ in range(RETAINED_RESPONSES)]
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del responses
+    return retained / RETAINED_RESPONSES
+
+
+def bench_send_request(server: StubServer, requests_count: int) -> Dict[str, Dict[str, float]]:
+    controller = Base()
+    raw_session = requests.Session()
+    results = {}
+    for name, size in PAYLOAD_SIZES.items():
+        url = f'{server.url}/payload/{name}'
+        # fewer rounds for big bodies, transfer dominates there anyway
+        count = max(requests_count * 1024 // size, 50) if size > 64 * 1024 else requests_count
+        raw = latency(lambda: raw_session.get(url, headers={'Content-Type': 'application/json'}).content, count)
+        framework = latency(lambda: controller.send_request(Base.RequestMethod.GET, custom_url=url), count)
+        results[name] = {
+            'requests': count,
+            'raw_mean_ms': raw['mean_ms'],
+            **framework,
+            'overhead_us': (framework['mean_ms'] - raw['mean_ms']) * 1000,
+            'bytes_per_response': retained_bytes(
+                lambda: controller.send_request(Base.RequestMethod.GET, custom_url=url))
+        }
+    raw_session.close()
+    return results
+
+
+def median_ms(func: Callable, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench_session(rounds: int) -> Dict[str, float]:
+    collect = [sys.executable, '-m', 'pytest', '--collect-only', '-q', '-p', 'no:cacheprovider']
+    return {
+        'collect_only_ms': median_ms(lambda: subprocess.run(collect, check=True, capture_output=True), rounds),
+        'settings_setup_ms': median_ms(lambda: Settings(env='STG', test_data='login').teardown(), rounds),
+        'settings_setup_local_ms': median_ms(lambda: Settings(env='LOCAL', test_data='login').teardown(), rounds)
+    }
+
+
+def git_commit() -> str:
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True)
+    return result.stdout.strip() or 'unknown'
+
+
+def flatten(results: Dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def compare(baseline_path: str, report: Dict):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = flatten(baseline['results'])
+    new = flatten(report['results'])
+    print(f'\n{"metric":50} {baseline["commit"]:>12} {report["commit"]:>12} {"change":>8}')
+    for key, value in new.items():
+        if key in old and old[key]:
+            print(f'{key:50} {old[key]:12.3f} {value:12.3f} {(value - old[key]) / old[key] * 100:+7.1f}%')
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=20000, help='calls per component micro benchmark')
+    parser.add_argument('--session_rounds', type=int, default=5)
+    parser.add_argument('--output', default='reports/bench_framework_overhead.json')
+    parser.add_argument('--compare', default=None, help='earlier result file to compare against')
+    args = parser.parse_args()
+    # send_request logs at INFO, keep it quiet unless a benchmark enables it
+    logging.getLogger().setLevel(logging.WARNING)
+
+    routes = [StubRoute('GET', f'/payload/{name}', json_body(size), headers={'Content-Type': 'application/json'})
+              for name, size in PAYLOAD_SIZES.items()]
+    with StubServer(routes) as server:
+        send_request = bench_send_request(server, args.requests)
+    report = {
+        'commit': git_commit(),
+        'timestamp': int(time.time()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {
+            'components': bench_components(args.rounds),
+            'send_request': send_request,
+            'session': bench_session(args.session_rounds)
+        }
+    }
+
+    for key, value in flatten(report['results']).items():
+        print(f'{key:50} {value:12.3f}')
+    if args.compare:
+        compare(args.compare, report)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f'\nresults written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
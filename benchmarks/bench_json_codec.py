@@ -0,0 +1,93 @@
+"""Compare the json_codec backends on the documents the framework handles.
+
+Usage: python -m benchmarks.bench_json_codec [--rounds 200] [--files 5000]
+
+For every installed backend (orjson, ujson, stdlib json):
+  * loads / dumps of API response bodies of 1kb, 64kb and 1mb
+  * res.json of a Base.ResponseObject, the path every test assertion takes
+  * reading a directory of allure `*-result.json` files through
+    get_testcase_result, as allure_report_parser.py does
+"""
+import os
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import Callable
+from module import json_codec
+from module.base.base_request import Base
+from allure_report_parser import get_testcase_result
+from benchmarks.bench_framework_overhead import build_response
+from benchmarks.bench_result_ingestion import write_result_files
+
+RESPONSE_SIZES = {'1kb': 1024, '64kb': 64 * 1024, '1mb': 1024 * 1024}
+
+
+def response_document(size: int) -> dict:
+    # paged list endpoint, nested objects, unicode and floats like real payloads
+    item = {
+        'id': 0,
+        'login': 'octocat',
+        'name': 'Mona Lisa Octocat',
+        'bio': 'Ünïcode bïo ✓',
+        'site_admin': False,
+        'score': 99.5,
+        'created_at': '2011-01-25T18:44:36Z',
+        'plan': {'name': 'pro', 'space': 976562499, 'collaborators': 0, 'private_repos': 9999},
+        'tags': ['api', 'user', 'login'],
+        'company': None
+    }
+    item_size = len(json_codec.JsonCodec().dumps(item)) + 1
+    items = [dict(item, id=i) for i in range(max(size // item_size, 1))]
+    return {'total_count': len(items), 'incomplete_results': False, 'items': items}
+
+
+def per_call_us(func: Callable, rounds: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def res_json(body: bytes):
+    # a fresh object each call, res.json is cached after the first access
+    return Base.ResponseObject(build_response(body)).json
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=200, help='calls per 1kb document, scaled down for larger ones')
+    parser.add_argument('--files', type=int, default=5000, help='allure result files to read')
+    args = parser.parse_args()
+
+    documents = {name: response_document(size) for name, size in RESPONSE_SIZES.items()}
+    bodies = {name: json_codec.JsonCodec().dumps(document) for name, document in documents.items()}
+    root = tempfile.mkdtemp(prefix='json-codec-bench-')
+    try:
+        write_result_files(root, args.files)
+        files = sorted(os.path.join(root, name) for name in os.listdir(root))
+        print(f'{"backend":8} {"document":22} {"loads us":>12} {"dumps us":>12} {"res.json us":>12}')
+        for name in json_codec.available_codecs():
+            codec = json_codec.set_codec(name)
+            for size_name, size in RESPONSE_SIZES.items():
+                rounds = max(args.rounds * 1024 // size, 5)
+                body, document = bodies[size_name], documents[size_name]
+                print(f'{name:8} {"response " + size_name:22} '
+                      f'{per_call_us(lambda: codec.loads(body), rounds):12.1f} '
+                      f'{per_call_us(lambda: codec.dumps(document), rounds):12.1f} '
+                      f'{per_call_us(lambda: res_json(body), rounds):12.1f}')
+
+            start = time.perf_counter()
+            for path in files:
+                get_testcase_result(path)
+            elapsed = time.perf_counter() - start
+            print(f'{name:8} {"allure results":22} {elapsed / len(files) * 1e6:12.1f} '
+                  f'{"":>12} {"":>12}   {len(files) / elapsed:.0f} files/s')
+    finally:
+        shutil.rmtree(root)
+        json_codec.set_codec()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Compare the iterative key conversion with the former recursive one.
+
+Usage: python -m benchmarks.bench_key_conversion [--items 50000] [--rounds 3]
+
+Converts a list response of `--items` user objects from camelCase to
+snake_case with the former recursive function, convert_keys (copy and in
+place) and iter_convert_keys, and reports the best time and peak memory.
+"""
+import copy
+import re
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Callable
+from module.file_operation import (
+    convert_keys,
+    convert_payload_from_snake_to_camel,
+    iter_convert_keys,
+    to_snake
+)
+
+
+def legacy_to_snake(name):
+    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+
+
+def legacy_convert(data):
+    # convert_payload_from_camel_to_snake as it was, kept for comparison
+    if isinstance(data, list):
+        new_list = []
+        for iter_data in data:
+            convert_data = legacy_convert(iter_data)
+            new_list.append(convert_data)
+        return new_list
+    elif isinstance(data, dict):
+        new_data = dict()
+        for key, value in data.items():
+            new_key = legacy_to_snake(key)
+            value = legacy_convert(value)
+            new_data.update({new_key: value})
+        return new_data
+    elif isinstance(data, (str, int, float)):
+        return data
+
+
+def response_items(count: int) -> list:
+    return [{
+        'userId': i,
+        'loginName': f'user_{i}',
+        'isSiteAdmin': i % 2 == 0,
+        'avatarUrl': None,
+        'accountScore': i * 0.5,
+        'contactInfo': {'emailAddress': f'user_{i}@example.com', 'phoneNumbers': ['+100', '+200']},
+        'repoList': [{'repoName': 'api', 'starCount': 3, 'isPrivate': False}]
+    } for i in range(count)]
+
+
+def measure(label: str, func: Callable, make_input: Callable, rounds: int):
+    best = float('inf')
+    for _ in range(rounds):
+        data = make_input()
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    data = make_input()
+    tracemalloc.start()
+    func(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'{label:28} {best * 1000:10.1f} ms {peak / 1024 / 1024:10.1f} MiB peak')
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    items = response_items(args.items)
+    assert legacy_convert(items) == convert_keys(items, to_snake)
+    # snake -> camel -> snake gives the keys back, odd underscores included
+    snake_keys = {'user_id': 1, '_private_id': 2, 'trailing_': 3, 'a__b': 4, '__dunder__': 5, 'a_b_c': 6}
+    assert convert_keys(convert_payload_from_snake_to_camel(snake_keys), to_snake) == snake_keys
+    shared = lambda: items  # noqa: E731
+    fresh = lambda: copy.deepcopy(items)  # noqa: E731
+
+    print(f'{args.items} items, camelCase -> snake_case')
+    measure('recursive (former)', legacy_convert, shared, args.rounds)
+    measure('convert_keys copy', lambda data: convert_keys(data, to_snake), shared, args.rounds)
+    measure('convert_keys in_place', lambda data: convert_keys(data, to_snake, in_place=True), fresh, args.rounds)
+    # generator consumed one item at a time, only one converted item is alive at once
+    measure('iter_convert_keys', lambda data: all(True for _ in iter_convert_keys(data, to_snake)),
+            shared, args.rounds)
+    snake = convert_keys(items, to_snake)
+    measure('snake -> camel copy', convert_payload_from_snake_to_camel, lambda: snake, args.rounds)
+
+    nested = deep = {}
+    for _ in range(100000):
+        deep['childNode'] = {}
+        deep = deep['childNode']
+    try:
+        legacy_convert(nested)
+        print('recursive converted 100000 levels')
+    except RecursionError:
+        print('recursive hits RecursionError at 100000 levels, convert_keys does not')
+    convert_keys(nested, to_snake)
+
+
+if __name__ == '__main__':
+    main()
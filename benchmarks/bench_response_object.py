@@ -0,0 +1,89 @@
+"""Compare the lazy Base.ResponseObject with the former eager one.
+
+Usage: python -m benchmarks.bench_response_object [--size_mb 8] [--rounds 5]
+
+For every body kind the bench builds ResponseObjects which are only asserted
+on `status_code` (the common case) and reports time and peak memory per object.
+"""
+import gc
+import json
+import logging
+import os
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Callable, Dict
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from module.base.base_request import Base
+
+logging.disable(logging.WARNING)
+
+
+class EagerResponseObject(object):
+    # ResponseObject as it was before lazy decoding, kept for comparison
+    def __init__(self, response: Response):
+        self.status_code = response.status_code
+        self.content = response.content
+        self.text = response.text
+        try:
+            self.json = response.json()
+        except Exception:
+            self.json = None
+        self.header = response.headers
+        self.url = response.url
+
+
+def build_bodies(size_mb: int) -> Dict[str, bytes]:
+    size = size_mb * 1024 * 1024
+    record = {'id': 1, 'name': 'user_name', 'tags': ['a', 'b', 'c'], 'score': 99.5}
+    records = [record] * (size // len(json.dumps(record)))
+    return {
+        'json': json.dumps(records).encode('utf-8'),
+        'text': (b'line of csv export,1,2,3\n' * (size // 25)),
+        'binary': os.urandom(size)
+    }
+
+
+def build_response(body: bytes) -> Response:
+    response = Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({'Content-Type': 'application/octet-stream'})
+    response.encoding = 'utf-8'
+    response.url = 'http://localhost/bench'
+    response._content = body
+    return response
+
+
+def measure(factory: Callable, body: bytes, rounds: int) -> Dict[str, float]:
+    elapsed = 0.0
+    peak = 0
+    for _ in range(rounds):
+        response = build_response(body)
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        res_obj = factory(response)
+        assert res_obj.status_code == 200
+        elapsed += time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        del res_obj, response
+    return {'ms': elapsed / rounds * 1000, 'peak_mb': peak / 1024 / 1024}
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--size_mb', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"body":8} {"impl":6} {"ms/obj":>10} {"peak MB":>10}')
+    for kind, body in build_bodies(args.size_mb).items():
+        for impl, factory in (('eager', EagerResponseObject), ('lazy', Base.ResponseObject)):
+            result = measure(factory, body, args.rounds)
+            print(f'{kind:8} {impl:6} {result["ms"]:10.2f} {result["peak_mb"]:10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Sequential vs pooled parsing of allure result files.
+
+Usage: python -m benchmarks.bench_result_ingestion [--files 50000] [--workers 8]
+
+Writes a synthetic directory of `*-result.json` files shaped like
+allure-pytest output, then times iter_testcase_results over it.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from argparse import ArgumentParser
+from module import json_codec
+from allure_report_parser import iter_testcase_results
+
+
+def write_result_files(root: str, count: int):
+    for i in range(count):
+        result_uuid = str(uuid.uuid4())
+        result = {
+            'name': f'test_case_{i}',
+            'status': 'passed' if i % 10 else 'failed',
+            'steps': [],
+            'attachments': [{'name': 'log', 'source': f'{result_uuid}-attachment.txt', 'type': 'text/plain'}],
+            'parameters': [],
+            'start': 1700000000000 + i,
+            'stop': 1700000000500 + i,
+            'uuid': result_uuid,
+            'historyId': uuid.uuid4().hex,
+            'testCaseId': uuid.uuid4().hex,
+            'fullName': f'testsuite.login.test_login.TestLogin#test_case_{i}',
+            'labels': [
+                {'name': 'severity', 'value': 'critical'},
+                {'name': 'tag', 'value': 'user'},
+                {'name': 'tag', 'value': 'login'},
+                {'name': 'parentSuite', 'value': 'testsuite.login'},
+                {'name': 'suite', 'value': 'test_login'},
+                {'name': 'subSuite', 'value': 'TestLogin'},
+                {'name': 'host', 'value': 'ci-runner'},
+                {'name': 'thread', 'value': '1-MainThread'},
+                {'name': 'framework', 'value': 'pytest'},
+                {'name': 'language', 'value': 'cpython3'},
+                {'name': 'package', 'value': 'testsuite.login.test_login'}
+            ]
+        }
+        with open(os.path.join(root, f'{result_uuid}-result.json'), 'w') as f:
+            json.dump(result, f)
+
+
+def run(label: str, files, **kwargs):
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_testcase_results(files, **kwargs))
+    elapsed = time.perf_counter() - start
+    print(f'{label:32} {count:8d} files {elapsed:8.2f}s {count / elapsed:10.0f} files/s')
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--files', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='allure-bench-')
+    try:
+        write_result_files(root, args.files)
+        files = sorted(os.path.join(root, name) for name in os.listdir(root))
+        for decoder in json_codec.available_codecs():
+            json_codec.set_codec(decoder)
+            run(f'sequential/{decoder}', files, workers=1)
+            run(f'thread x{args.workers}/{decoder}', files, workers=args.workers, executor='thread')
+            run(f'process x{args.workers}/{decoder}', files, workers=args.workers, executor='process')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
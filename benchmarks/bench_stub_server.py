@@ -0,0 +1,53 @@
+"""Requests per second the bundled StubServer sustains.
+
+Usage: python -m benchmarks.bench_stub_server [--requests 20000] [--concurrency 50] [--path /user]
+
+Starts the server with the LOCAL routes and drives it with keep-alive aiohttp
+connections from another thread, so the number is an upper bound the client
+side can be benchmarked against.
+"""
+import asyncio
+import logging
+import time
+from argparse import ArgumentParser
+import aiohttp
+from configs.env_local import stub_routes
+from module.stub_server import StubServer
+
+logging.disable(logging.WARNING)
+
+
+async def drive(url: str, requests: int, concurrency: int) -> int:
+    remaining = requests
+    received = 0
+
+    async def client(session: aiohttp.ClientSession):
+        nonlocal remaining, received
+        while remaining > 0:
+            remaining -= 1
+            async with session.get(url) as res:
+                received += len(await res.read())
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    return received
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--path', default='/user')
+    args = parser.parse_args()
+
+    with StubServer(stub_routes()) as server:
+        start = time.perf_counter()
+        received = asyncio.run(drive(server.url + args.path, args.requests, args.concurrency))
+        elapsed = time.perf_counter() - start
+    print(f'{args.path:12} {args.requests:8d} requests {elapsed:8.2f}s '
+          f'{args.requests / elapsed:10.0f} req/s {received / elapsed / 1024 / 1024:8.1f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
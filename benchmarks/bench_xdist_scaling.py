@@ -0,0 +1,84 @@
+"""How a suite scales over pytest-xdist workers.
+
+Usage: python -m benchmarks.bench_xdist_scaling [--workers 1,2,4,8,16] [--tests 400] [--requests 5] [--delay_ms 20]
+
+Generates a throwaway test module next to the real testsuites (so the root
+conftest applies), where every test sends `requests` calls through a Login
+controller to a stub route answering after `delay_ms`. Each worker runs its
+own stub server (--env LOCAL). Prints wall time, tests/s and speedup against
+the run without xdist, and writes them as json with --output.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+SUITE_DIR = os.path.join('testsuite', '_bench_xdist')
+
+TEST_MODULE = '''import pytest
+from module.base.base_request import Base
+from module.login.login import Login
+from module.stub_server import StubRoute
+
+
+@pytest.fixture(scope="module")
+def controller(setup, stub_server):
+    stub_server.add_route(StubRoute('GET', '/bench', {{"ok": True}}, delay={delay}))
+    yield Login(setup.environment, setup.test_data), stub_server.url + '/bench'
+
+
+@pytest.mark.parametrize('case', range({tests}))
+def test_bench(controller, case):
+    login, url = controller
+    for _ in range({requests}):
+        assert login.send_request(Base.RequestMethod.GET, custom_url=url).status_code == 200
+'''
+
+
+def run_suite(workers: int) -> float:
+    command = [sys.executable, '-m', 'pytest', SUITE_DIR, '-q', '-p', 'no:cacheprovider',
+               '--env', 'LOCAL', '--test_data', 'login', '--request_log', 'off',
+               '-o', 'log_cli=false']
+    command += ['-n', str(workers)] if workers else ['-p', 'no:xdist']
+    start = time.perf_counter()
+    subprocess.run(command, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--workers', default='1,2,4,8,16')
+    parser.add_argument('--tests', type=int, default=400)
+    parser.add_argument('--requests', type=int, default=5)
+    parser.add_argument('--delay_ms', type=float, default=20)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    os.makedirs(SUITE_DIR, exist_ok=True)
+    try:
+        with open(os.path.join(SUITE_DIR, 'test_bench_xdist.py'), 'w') as f:
+            f.write(TEST_MODULE.format(tests=args.tests, requests=args.requests, delay=args.delay_ms / 1000))
+
+        baseline = run_suite(0)
+        rows = [{'workers': 0, 'seconds': baseline, 'tests_per_s': args.tests / baseline, 'speedup': 1.0}]
+        for workers in (int(w) for w in args.workers.split(',')):
+            elapsed = run_suite(workers)
+            rows.append({'workers': workers, 'seconds': elapsed, 'tests_per_s': args.tests / elapsed,
+                         'speedup': baseline / elapsed})
+    finally:
+        shutil.rmtree(SUITE_DIR)
+
+    print(f'{"workers":>8} {"seconds":>9} {"tests/s":>9} {"speedup":>8}')
+    for row in rows:
+        print(f'{row["workers"] or "no xdist":>8} {row["seconds"]:9.2f} {row["tests_per_s"]:9.1f} {row["speedup"]:8.2f}')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'tests': args.tests, 'requests': args.requests, 'delay_ms': args.delay_ms,
+                       'cpu_count': os.cpu_count(), 'results': rows}, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,3 +17,4 @@ class Base(BaseConfig):
         super().__init__()
         self.git_token = env.GIT_TOKEN
         self.domain = env.GIT_DOMAIN
+        self._https = env.GIT_SCHEME
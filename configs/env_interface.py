@@ -9,17 +9,20 @@ class ENV_ENUMS(str, Enum):
     DEM = 'DEM'
     STG = 'STG'
     PRD = 'PRD'
+    LOCAL = 'LOCAL'
 
 
 @dataclass
 class EnvironmentVariables:
     GIT_TOKEN = "GIT_TOKEN"
+    STUB_ROUTES = "STUB_ROUTES"
 
 
 @dataclass
 class ENV:
     GIT_DOMAIN: str
     GIT_TOKEN: str
+    GIT_SCHEME: str = 'https://'
 
 
 @dataclass
@@ -0,0 +1,31 @@
+import os
+from configs.env_interface import (
+    ENV,
+    EnvironmentVariables
+)
+from dataclasses import dataclass
+from typing import List
+from module.stub_server import StubRoute
+
+
+@dataclass
+class LOCAL(ENV):
+    # GIT_DOMAIN is the address of the stub server started by Settings.set_env
+    GIT_DOMAIN: str = ''
+    GIT_TOKEN: str = 'stub-token'
+    GIT_SCHEME: str = 'http://'
+    # json file with extra StubRoute definitions
+    STUB_ROUTES: str = os.getenv(EnvironmentVariables.STUB_ROUTES)
+
+
+def stub_routes() -> List[StubRoute]:
+    # offline stand-in for the endpoints used by the testsuites, built only when
+    # a stub server starts, the canned bodies of /large and /chunked are megabytes
+    return [
+        StubRoute('GET', '/user', {"login": "GIT_USER_NAME", "id": 0000}),
+        StubRoute('*', '/echo', '{"method": "$method", "path": "$path", "query": "$query"}',
+                  headers={'Content-Type': 'application/json'}),
+        StubRoute('GET', '/large', b'{"padding": "0123456789abcdef"}\n', body_size=8 * 1024 * 1024),
+        StubRoute('GET', '/slow', {"slow": True}, delay=0.5),
+        StubRoute('GET', '/chunked', b'row,1,2,3\n', body_size=1024 * 1024, chunk_size=16 * 1024)
+    ]
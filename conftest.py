@@ -1,100 +1,156 @@
-from dataclasses import dataclass
-from module.file_operation import read_json
 from module.settings import Settings
-from datetime import datetime
-from typing import List
+from module.stub_server import StubServer
+from module.base.cassette import (
+    Cassette,
+    CassetteMode
+)
+from module.base.shared_cache import prune_cache_dirs
+from module.data_driven import parametrize_dataset
+from module.shard_planner import (
+    load_plan,
+    parse_shard,
+    select_shard
+)
+from module.testsuite_config import (
+    TestsuiteConfig,
+    load_testsuite_config
+)
+from module.testdata_registry import (
+    TESTDATA_REGISTRY,
+    TestDataRegistry
+)
+from typing import Optional
 import allure
-import json
+import os
 import pytest
 
 
-@dataclass
-class TestsuiteConfig:
-    @dataclass
-    class metadata_obj:
-        testsuite: str
-        tags: list
-        city_name: str
-        city_id: int
-
-    @dataclass
-    class testcase_obj:
-        name: str = None
-        tags: List[str] = list
-        severity: str = None
-        story: str = None
-        feature: str = None
-        testrail_suite_id: int = 0
-        testrail_case_id: int = 0
-
-    metadata: metadata_obj = None
-    testcases: List[testcase_obj] = list
-
-
-def load_testsuite_config(path: str) -> TestsuiteConfig:
-    config_json = read_json(path)
-
-    config = TestsuiteConfig(
-        metadata=None,
-        testcases=[]
-    )
-
-    config.metadata = TestsuiteConfig.metadata_obj(
-        testsuite=config_json['metadata']['testsuite_name'],
-        tags=config_json['metadata']['tags'],
-        city_name=config_json['metadata']['city_name'],
-        city_id=config_json['metadata']['city_id']
-    )
-
-    for item in config_json['testcases']:
-        tc = TestsuiteConfig.testcase_obj(
-            name=item['name'],
-            tags=item['tags'],
-            severity=item['severity'],
-            story=item['story'],
-            feature=item['feature'],
-            testrail_suite_id=item['testrail_suite_id'],
-            testrail_case_id=item['testrail_case_id']
-        )
-        config.testcases.append(tc)
-
-    return config
-
-
 def pytest_addoption(parser):
     parser.addoption('--env', action='store',
-                     help='setup environment; STAGING, PROD', default="STG")
+                     help='setup environment; STG, LOCAL (bundled stub server)', default="STG")
+    parser.addoption('--cassette', action='store', choices=['off', 'record', 'replay'],
+                     help='record API interactions to a cassette or replay them without network', default="off")
+    parser.addoption('--cassette_path', action='store',
+                     help='sqlite cassette file', default="cassettes/cassette.sqlite")
     parser.addoption('--test_data', action='store',
                      help='setup name of test data set (ex: test_data_set_1)')
     parser.addoption('--testsuite_config', action='store',
                      help='path of testsuite config')
+    parser.addoption('--tags', action='store',
+                     help='run only testcases with any of these testsuite config tags, comma separated')
+    parser.addoption('--severity', action='store',
+                     help='run only testcases with these testsuite config severities, comma separated')
+    parser.addoption('--pool_connections', action='store', type=int,
+                     help='number of host connection pools kept per session', default=10)
+    parser.addoption('--pool_maxsize', action='store', type=int,
+                     help='max keep-alive connections per host', default=10)
+    parser.addoption('--shard', action='store',
+                     help='run only shard k of N (ex: 2/4), balanced by the durations of --shard_plan')
+    parser.addoption('--shard_plan', action='store',
+                     help='durations written by shard_planner.py', default="reports/shard_plan.json")
+    parser.addoption('--dataset_sample', action='store',
+                     help='run a seeded sample of the rows of every dataset test; a row count, or a fraction below 1')
+    parser.addoption('--dataset_shard', action='store',
+                     help='run only every N-th row of every dataset test starting at k (ex: 2/4)')
+    parser.addoption('--request_metrics', action='store',
+                     help='write per test and per endpoint request timing to this jsonl file')
+    parser.addoption('--request_log', action='store', choices=['banner', 'structured', 'off'],
+                     help='response logging of send_request; structured is one queued record per request', default="banner")
+    parser.addoption('--request_log_sample', action='store', type=int,
+                     help='log 1 in N successful responses, failures and 202 are always logged', default=1)
+    parser.addoption('--request_log_preview', action='store', type=int,
+                     help='max response body bytes in a structured record', default=1024)
 
 
 def pytest_configure(config):
     # register an additional marker
     config.addinivalue_line("markers",
                             "version(number): mark test to run only on named version")
+    config.pluginmanager.register(_ShardPlugin(), 'shard')
+
+
+def pytest_generate_tests(metafunc):
+    # @pytest.mark.dataset('testdata/login/user_info.jsonl'), one case per row
+    for marker in metafunc.definition.iter_markers('dataset'):
+        parametrize_dataset(metafunc, *marker.args, **marker.kwargs)
+
+
+def pytest_sessionstart(session):
+    # a recording replaces the cassette, cleared before xdist workers start appending to it
+    config = session.config
+    if not hasattr(config, 'workerinput') and config.getoption('--cassette') == CassetteMode.RECORD.value:
+        path = config.getoption('--cassette_path')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        cassette = Cassette(path, CassetteMode.RECORD)
+        cassette.clear()
+        cassette.close()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # the xdist controller or a plain run, workers carry workerinput
+    if not hasattr(session.config, 'workerinput'):
+        prune_cache_dirs()
 
 
 @pytest.fixture(scope="session", autouse=True)
 def setup(request: Settings):
     setup = Settings(request)
     yield setup
+    setup.teardown()
+
+
+@pytest.fixture(scope="session")
+def stub_server(setup: Settings) -> StubServer:
+    # stand-in API of --env LOCAL, tests may add routes to it
+    if setup.stub_server is None:
+        setup.stub_server = StubServer().start()
+    return setup.stub_server
+
+
+@pytest.fixture(scope="session")
+def testsuite_config(request) -> Optional[TestsuiteConfig]:
+    path = request.config.getoption("--testsuite_config", default=None)
+    return load_testsuite_config(path) if path else None
+
+
+def _split_option(value: Optional[str]) -> set:
+    return {v.strip() for v in value.split(',') if v.strip()} if value else set()
 
 
 @pytest.hookimpl(tryfirst=True)
 def pytest_collection_modifyitems(session, config, items):
     testsuite_config_path = config.getoption("--testsuite_config", default="")
+    if testsuite_config_path:
+        _select_by_testsuite_config(config, items, testsuite_config_path)
+
+
+class _ShardPlugin:
+    # a conftest has one implementation per hook, sharding needs its own trylast one
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        # after -k / -m and the testsuite config, so shards are balanced over the tests that run
+        shard = config.getoption("--shard", default=None)
+        if shard:
+            _select_shard(config, items, shard)
+
+
+def pytest_collection_finish(session):
+    # node ids of the selected tests, Settings binds them to the test data
+    registry = TestDataRegistry()
+    registry.register_items(session.items)
+    session.config.stash[TESTDATA_REGISTRY] = registry
+
+
+def _select_by_testsuite_config(config, items, testsuite_config_path: str):
     testsuite_config: TestsuiteConfig = load_testsuite_config(
         testsuite_config_path)
-    testcase_obj: TestsuiteConfig.testcase_obj = None
+    selected_tags = _split_option(config.getoption("--tags", default=None))
+    selected_severities = _split_option(config.getoption("--severity", default=None))
 
-    for item in session.items:
-        testcase_name = item.name
-        for tc in testsuite_config.testcases:
-            if tc.name == testcase_name:
-                testcase_obj = tc
-                break
+    selected = []
+    deselected = []
+    for item in items:
+        testcase_obj = testsuite_config.get_item_testcase(item)
 
         if testcase_obj:
             # Add Marker for Testcase
@@ -103,7 +159,26 @@ def pytest_collection_modifyitems(session, config, items):
                 item.add_marker(allure.tag(*testcase_obj.tags))
                 item.add_marker(allure.story(*testcase_obj.story))
                 item.add_marker(allure.feature(*testcase_obj.feature))
-            testcase_obj = None
 
-        print(testcase_obj)
-    pass
+        # Deselect before setup, so filtered testcases never run their fixtures
+        if selected_tags and not (testcase_obj and selected_tags.intersection(testcase_obj.tags)):
+            deselected.append(item)
+        elif selected_severities and not (testcase_obj and testcase_obj.severity in selected_severities):
+            deselected.append(item)
+        else:
+            selected.append(item)
+
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def _select_shard(config, items, shard: str):
+    # every node collects the same items and computes the same plan
+    index, count = parse_shard(shard)
+    plan_path = config.getoption("--shard_plan", default="")
+    durations, default_ms = load_plan(plan_path) if plan_path and os.path.exists(plan_path) else ({}, None)
+    selected, deselected = select_shard(items, index, count, durations, default_ms)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
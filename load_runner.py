@@ -0,0 +1,82 @@
+import json
+import logging
+from argparse import ArgumentParser
+from importlib import import_module
+from typing import Dict, List, Optional
+from module.load_test import (
+    LoadRunner,
+    LoadTarget
+)
+from module.settings import Settings
+
+
+def get_arguments() -> Optional[Dict]:
+    parser = ArgumentParser(description='Drive virtual users through API controller methods.')
+    parser.add_argument("--target", dest='targets', action='append', required=True,
+                        help='controller method to call, repeatable: module.login.login:Login.get_user_info[=weight]')
+    parser.add_argument("--env", dest='env', action='store',
+                        help='setup environment; STG, LOCAL (bundled stub server)', default="STG")
+    parser.add_argument("--test_data", dest='test_data', action='store', required=True,
+                        help='setup name of test data set (ex: login)')
+    parser.add_argument("--users", dest='users', action='store', type=int,
+                        help='number of concurrent virtual users', default=10)
+    parser.add_argument("--rate", dest='rate', action='store', type=float,
+                        help='total target requests per second, unlimited when not given', default=None)
+    parser.add_argument("--ramp_up", dest='ramp_up', action='store', type=float,
+                        help='seconds to start all users and reach the target rate', default=0)
+    parser.add_argument("--duration", dest='duration', action='store', type=float,
+                        help='seconds of load', default=60)
+    parser.add_argument("--output", dest='output', action='store',
+                        help='write the report as json to this path', default=None)
+    args_obj = parser.parse_args()
+    return vars(args_obj)
+
+
+def build_targets(specs: List[str], settings: Settings) -> List[LoadTarget]:
+    targets = []
+    controllers = {}
+    for spec in specs:
+        path, _, weight = spec.partition('=')
+        module_name, _, attr = path.partition(':')
+        class_name, _, method_name = attr.partition('.')
+        if (module_name, class_name) not in controllers:
+            controller_class = getattr(import_module(module_name), class_name)
+            # controllers are built the same way testsuite fixtures build them
+            controllers[(module_name, class_name)] = controller_class(settings.environment, settings.test_data)
+        controller = controllers[(module_name, class_name)]
+        targets.append(LoadTarget(
+            name=attr,
+            func=getattr(controller, method_name),
+            weight=int(weight) if weight else 1
+        ))
+    return targets
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)8s] %(message)s')
+    # per request logging of send_request would dominate the measurement
+    logging.getLogger('module.base.base_request').setLevel(logging.WARNING)
+
+    settings = Settings(
+        env=args['env'],
+        test_data=args['test_data'],
+        pool_connections=10,
+        pool_maxsize=args['users']
+    )
+    runner = LoadRunner(
+        build_targets(args['targets'], settings),
+        users=args['users'],
+        duration=args['duration'],
+        rate=args['rate'],
+        ramp_up=args['ramp_up']
+    )
+    try:
+        runner.run()
+    finally:
+        settings.teardown()
+
+    print(runner.format_report())
+    if args['output']:
+        with open(args['output'], 'w') as f:
+            json.dump(runner.report(), f, indent=4)
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Iterable, List
+import aiohttp
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from module.base.session_pool import (
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    PoolStats,
+    get_worker_id
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 20
+
+
+class AsyncSessionPool(object):
+    """aiohttp counterpart of SessionPool.
+
+    aiohttp sessions are bound to the event loop which created them, so one
+    session is kept per running loop. `pool_maxsize` caps connections per host
+    and `pool_connections * pool_maxsize` caps connections overall.
+    """
+
+    def __init__(self,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> None:
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.stats = PoolStats()
+        self._sessions = weakref.WeakKeyDictionary()
+
+    def configure(self, pool_connections: int = None, pool_maxsize: int = None):
+        if pool_connections is not None:
+            self.pool_connections = pool_connections
+        if pool_maxsize is not None:
+            self.pool_maxsize = pool_maxsize
+        return self
+
+    def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_connections * self.pool_maxsize,
+                limit_per_host=self.pool_maxsize
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                # same as the sync pool, never keep cookies between requests
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trace_configs=[self._trace_config()]
+            )
+            self._sessions[loop] = session
+        return session
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        stats = self.stats
+
+        async def on_request_start(session, context, params):
+            stats.count_request()
+
+        async def on_connection_create_start(session, context, params):
+            context.create_start = time.perf_counter()
+
+        async def on_connection_create_end(session, context, params):
+            stats.count_opened()
+            # trace_request_ctx is the RequestTiming of send_request_async when metrics are on
+            timing = context.trace_request_ctx
+            if timing is not None:
+                # aiohttp does not split tls from connect
+                timing.connect_ms += (time.perf_counter() - context.create_start) * 1000 - timing.dns_ms
+
+        async def on_dns_resolvehost_start(session, context, params):
+            context.dns_start = time.perf_counter()
+
+        async def on_dns_resolvehost_end(session, context, params):
+            if context.trace_request_ctx is not None:
+                context.trace_request_ctx.dns_ms += (time.perf_counter() - context.dns_start) * 1000
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        return trace_config
+
+    async def close(self):
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+            logger.info('async session pool (%s) closed, %s', get_worker_id(), self.stats.as_dict())
+
+
+async def gather_with_limit(aws: Iterable[Awaitable], limit: int = DEFAULT_CONCURRENCY,
+                            return_exceptions: bool = False) -> List[Any]:
+    """Run awaitables concurrently, at most `limit` of them at a time.
+    Args:
+        aws: coroutines, eg. [controller.get_user_info_async() for _ in range(200)]
+        limit: max number of in-flight awaitables, default 20
+        return_exceptions: same as asyncio.gather
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _bounded(aw: Awaitable):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*[_bounded(aw) for aw in aws], return_exceptions=return_exceptions)
+
+
+async def iter_async(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    # aiohttp streams async iterables only, eg. a compressed request body
+    for chunk in chunks:
+        yield chunk
+
+
+def run_async(aw: Awaitable, pool: AsyncSessionPool) -> Any:
+    """asyncio.run which also closes the pooled session of the loop it created."""
+    async def _main():
+        try:
+            return await aw
+        finally:
+            await pool.close()
+
+    return asyncio.run(_main())
+
+
+def to_form_data(files) -> aiohttp.FormData:
+    # accepts the same `files` shapes requests does:
+    # {'field': fileobj}, {'field': (filename, fileobj[, content_type])} or a list of such pairs
+    form = aiohttp.FormData()
+    items = files.items() if isinstance(files, dict) else files
+    for field_name, value in items:
+        if isinstance(value, (tuple, list)):
+            filename, fileobj = value[0], value[1]
+            content_type = value[2] if len(value) > 2 else None
+        else:
+            filename, fileobj, content_type = getattr(value, 'name', field_name), value, None
+        form.add_field(field_name, fileobj, filename=filename, content_type=content_type)
+    return form
+
+
+def to_requests_response(res: aiohttp.ClientResponse, content: bytes) -> Response:
+    # Build a requests Response so Base.ResponseObject stays the single response shape
+    response = Response()
+    response.status_code = res.status
+    response.reason = res.reason
+    response.headers = CaseInsensitiveDict(res.headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = str(res.url)
+    response._content = content
+    return response
@@ -1,34 +1,232 @@
 # flake8: noqa E501
 import logging
-import json
 import os
 import uuid
 import gzip
-import requests
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from enum import Enum
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
 from requests.models import Response
+from module.base.session_pool import SessionPool
+from module.base.cassette import (
+    CassetteMode,
+    build_response,
+    prepare_url
+)
+from module.base.request_metrics import (
+    RequestMetrics,
+    RequestTiming,
+    headers_size,
+    request_size,
+    start_timing,
+    stop_timing
+)
+from module.base.async_session import (
+    AsyncSessionPool,
+    iter_async,
+    run_async,
+    to_form_data,
+    to_requests_response
+)
+from module.base.request_compression import (
+    ContentEncoding,
+    RequestCompression,
+    compress_body
+)
+from module.base.request_log import (
+    RequestLog,
+    RequestLogMode
+)
+from module import json_codec
+from module.testdata_registry import (
+    TestDataRegistry,
+    nodeid_of_current_test
+)
+from module.histogram import LatencyHistogram
+from module.testsuite_config import TestsuiteConfig
 from testdata.base.base_testdata import (
     TestData,
     TestDataUnitKeys
 )
 logger = logging.getLogger(__name__)
 
+# marks lazily decoded ResponseObject fields which were not read yet
+_UNSET = object()
+
 
 class Base(object):
     data: TestData
+    # shared by every controller, keeps connections alive across requests
+    session_pool: SessionPool = SessionPool()
+    async_session_pool: AsyncSessionPool = AsyncSessionPool()
+    # RequestMetrics of the session, None keeps timing capture off
+    request_metrics: Optional[RequestMetrics] = None
+    # how responses are logged, see --request_log
+    request_log: RequestLog = RequestLog()
+    # test data of the collected tests, bound by Settings
+    testdata_registry: Optional[TestDataRegistry] = None
+    # --testsuite_config of the session, set by Settings
+    testsuite_config: Optional[TestsuiteConfig] = None
 
     class ResponseObject(object):
+        """Response snapshot returned by send_request.
+
+        `content` is kept as received, `text` and `json` are decoded on first
+        access and cached, so binary or large bodies never pay for decoding
+        nobody asked for.
+        """
+        __slots__ = ('status_code', 'content', 'header', 'url', 'timing', 'compression', '_response', '_text', '_json')
+
         def __init__(self, response: Response):
             self.status_code = response.status_code
             self.content = response.content
-            self.text = response.text
-            try:
-                self.json = response.json()
-            except Exception as e:
-                self.json = None
-                logger.warning(e)
             self.header = response.headers
             self.url = response.url
+            # RequestTiming when request metrics are enabled
+            self.timing = None
+            # CompressionStats of the request body when sent with compression
+            self.compression = None
+            self._response = response
+            self._text = _UNSET
+            self._json = _UNSET
+
+        @property
+        def elapsed_ms(self) -> float:
+            # whole request with metrics on, otherwise until response headers as measured by requests
+            if self.timing is not None:
+                return self.timing.total_ms
+            return self._response.elapsed.total_seconds() * 1000
+
+        @property
+        def text(self) -> str:
+            if self._text is _UNSET:
+                self._text = self._response.text
+            return self._text
+
+        @text.setter
+        def text(self, value: str):
+            self._text = value
+
+        @property
+        def json(self):
+            if self._json is _UNSET:
+                try:
+                    self._json = self._decode_json()
+                except Exception as e:
+                    self._json = None
+                    logger.warning(e)
+            return self._json
+
+        @json.setter
+        def json(self, value):
+            self._json = value
+
+        def _decode_json(self):
+            encoding = self._response.encoding
+            if encoding and encoding.lower().replace('-', '') not in ('utf8', 'ascii'):
+                # declared non utf-8 charset, let requests decode the text
+                return json_codec.loads(self.text)
+            return json_codec.loads(self.content)
+
+    class StreamResponseObject(object):
+        """Response returned by send_request when chunk_size is given.
+
+        The body is never held in memory, it is read once in `chunk_size`
+        pieces through iter_content or consume, which keep a running byte
+        count, line count and digests of the received body.
+        Args:
+            response: requests Response sent with stream=True
+            chunk_size: bytes read per chunk
+            hash_algorithms: hashlib algorithm names computed while reading
+        """
+        __slots__ = ('status_code', 'header', 'url', 'timing', 'compression', 'chunk_size', 'byte_count',
+                     'line_count', 'consumed', '_response', '_hashes', '_last_byte')
+
+        def __init__(self, response: Response, chunk_size: int, hash_algorithms: Tuple[str, ...] = ('sha256',)):
+            self.status_code = response.status_code
+            self.header = response.headers
+            self.url = response.url
+            self.timing = None
+            self.compression = None
+            self.chunk_size = chunk_size
+            self.byte_count = 0
+            self.line_count = 0
+            self.consumed = False
+            self._response = response
+            self._hashes = {name: hashlib.new(name) for name in hash_algorithms}
+            self._last_byte = b''
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            self.close()
+
+        @property
+        def elapsed_ms(self) -> float:
+            # until response headers, the body is read later by the test
+            return self._response.elapsed.total_seconds() * 1000
+
+        @property
+        def text(self) -> str:
+            # keeps assertion messages which print res.text working
+            return f'<streamed body, {self.byte_count} bytes read>'
+
+        @property
+        def json(self):
+            return None
+
+        def iter_content(self) -> Iterator[bytes]:
+            if self.consumed:
+                raise RuntimeError(f'streamed body of {self.url} was already consumed')
+            self.consumed = True
+            hashes = self._hashes.values()
+            try:
+                for chunk in self._response.iter_content(chunk_size=self.chunk_size):
+                    if not chunk:
+                        continue
+                    self.byte_count += len(chunk)
+                    self.line_count += chunk.count(b'\n')
+                    self._last_byte = chunk[-1:]
+                    for _hash in hashes:
+                        _hash.update(chunk)
+                    yield chunk
+                # count the last line even without a trailing newline
+                if self._last_byte not in (b'', b'\n'):
+                    self.line_count += 1
+            finally:
+                self.close()
+
+        def consume(self, path: str = None) -> 'Base.StreamResponseObject':
+            """Read the whole body, writing it to `path` when given. Safe to call more than once."""
+            if self.consumed:
+                return self
+            if path:
+                with open(path, 'wb') as f:
+                    for chunk in self.iter_content():
+                        f.write(chunk)
+            else:
+                for _ in self.iter_content():
+                    pass
+            return self
+
+        def hexdigest(self, algorithm: str = 'sha256') -> str:
+            if algorithm not in self._hashes:
+                raise ValueError('{} was not hashed, send_request hash_algorithms were: {}'.format(
+                    algorithm, ', '.join(self._hashes)))
+            self.consume()
+            return self._hashes[algorithm].hexdigest()
+
+        @property
+        def digests(self) -> Dict[str, str]:
+            self.consume()
+            return {name: _hash.hexdigest() for name, _hash in self._hashes.items()}
+
+        def close(self):
+            self._response.close()
 
     class RequestMethod(str, Enum):
         GET = "GET"
@@ -47,9 +245,187 @@ class Base(object):
                      cookies=None,
                      custom_url: str = None,
                      headers=None,
-                     files: list = None
+                     files: list = None,
+                     compression: Union[RequestCompression, str] = None,
+                     hash_algorithms: Tuple[str, ...] = ('sha256',)
                      ) -> ResponseObject:
+        """Send a request through the pooled session of the target host.
+        Args:
+            chunk_size: when greater than 0 the body is not read up front, a
+                StreamResponseObject iterating the body in chunk_size pieces is returned
+            hash_algorithms: hashlib names the StreamResponseObject digests while reading, eg. ('md5', 'sha256')
+            compression: 'gzip', 'deflate' or a RequestCompression, compresses the
+                POST / PUT / PATCH payload and sets Content-Encoding, stats end up in res.compression
+        """
+        _headers, _payload = self._prepare_request(
+            method, payload, custom_url, headers, files)
+        body_kwargs = {}
+        compression_stats = None
+        if compression is not None and self._has_body(method, _payload, files):
+            body, _headers, compression_stats = self._compress_payload(compression, _headers, _payload)
+            body_kwargs = {'data': body}
+        elif self._has_body(method, _payload, files):
+            body_kwargs = {'data': json_codec.dumps(_payload)}
+            _headers = self._json_headers(_headers)
+
+        # keep-alive session of the target host
+        res = None
+        session_res = self.session_pool.get_session(custom_url)
+        timing = start_timing() if self.request_metrics is not None else None
+        request_start = time.perf_counter()
+
+        if method is self.RequestMethod.GET:
+            res = session_res.get(
+                custom_url, headers=_headers, cookies=cookies, stream=True)
+        elif method is self.RequestMethod.POST:
+            res = session_res.post(
+                custom_url, headers=_headers, cookies=cookies, stream=True, files=files, **body_kwargs)
+        elif method is self.RequestMethod.PUT:
+            res = session_res.put(custom_url, headers=_headers,
+                                  cookies=cookies, stream=True, files=files, **body_kwargs)
+        elif method is self.RequestMethod.DELETE:
+            res = session_res.delete(
+                custom_url, headers=_headers, cookies=cookies, stream=True)
+        elif method is self.RequestMethod.PATCH:
+            res = session_res.patch(
+                custom_url, headers=_headers, cookies=cookies, stream=True, files=files, **body_kwargs)
+        else:
+            res = session_res.put(custom_url, headers=_headers,
+                                  cookies=cookies, stream=True, data=_payload, files=files)
+
+        headers_received = time.perf_counter()
+        if chunk_size:
+            res_obj = self.StreamResponseObject(res, chunk_size, hash_algorithms)
+        else:
+            res_obj = self.ResponseObject(res)
+        res_obj.compression = compression_stats
+        if timing is not None:
+            stop_timing()
+            # a streamed body is read later by the test, only headers are accounted
+            response_bytes = res.raw.tell() if not chunk_size else 0
+            request_bytes = request_size(res.request)
+            if compression_stats is not None and compression_stats.streamed:
+                # size of a streamed request body is only known once it was sent
+                request_bytes += compression_stats.sent_bytes
+            self._record_timing(res_obj, timing, res.request.method, request_start, headers_received,
+                                request_bytes, headers_size(res.headers) + response_bytes)
+        self._log_response(res_obj, payload, res.request.method)
+        return res_obj
+
+    async def send_request_async(self,
+                                 method: RequestMethod = RequestMethod.GET,
+                                 payload=None,
+                                 chunk_size: int = 0,
+                                 cookies=None,
+                                 custom_url: str = None,
+                                 headers=None,
+                                 files: list = None,
+                                 compression: Union[RequestCompression, str] = None
+                                 ) -> ResponseObject:
+        """Awaitable send_request, takes the same arguments and returns the same ResponseObject.
+        Use gather_with_limit to run many of them concurrently.
+        The body is always read in full, streaming with chunk_size > 0 is only
+        supported by send_request and raises ValueError here.
+        """
+        if chunk_size:
+            raise ValueError('send_request_async does not stream, use send_request with chunk_size')
+        _headers, _payload = self._prepare_request(
+            method, payload, custom_url, headers, files)
+
+        session = self.async_session_pool.get_session()
+        kwargs = {'headers': _headers, 'cookies': cookies}
+        compression_stats = None
+        if files:
+            kwargs['data'] = to_form_data(files)
+        elif compression is not None and self._has_body(method, _payload, files):
+            body, kwargs['headers'], compression_stats = self._compress_payload(compression, _headers, _payload)
+            kwargs['data'] = body if isinstance(body, bytes) else iter_async(body)
+        elif self._has_body(method, _payload, files):
+            kwargs['data'] = json_codec.dumps(_payload)
+            kwargs['headers'] = self._json_headers(_headers)
+
+        method_name = self.RequestMethod(method).value
+        cassette = self.session_pool.cassette
+        if cassette is not None:
+            url = prepare_url(custom_url)
+            # streamed bodies are keyed by url only, as in the sync adapter
+            body = kwargs['data'] if isinstance(kwargs.get('data'), bytes) else None
+            content_type = 'multipart/' if files else next(
+                (v for k, v in kwargs['headers'].items() if k.lower() == 'content-type'), '')
+            request_hash = cassette.request_hash(method_name, url, body, content_type)
+            if cassette.mode is CassetteMode.REPLAY:
+                res_obj = self.ResponseObject(build_response(url, *cassette.play(request_hash, method_name, url)))
+                self._log_response(res_obj, payload, method_name)
+                return res_obj
+
+        timing = RequestTiming() if self.request_metrics is not None else None
+        request_start = time.perf_counter()
+        async with session.request(method_name, custom_url,
+                                   trace_request_ctx=timing, **kwargs) as res:
+            headers_received = time.perf_counter()
+            content = await res.read()
+            response = to_requests_response(res, content)
+            response.elapsed = timedelta(seconds=headers_received - request_start)
+
+        if cassette is not None:
+            cassette.record(request_hash, method_name, url, response.status_code, response.reason,
+                            dict(response.headers), content)
+        res_obj = self.ResponseObject(response)
+        res_obj.compression = compression_stats
+        if timing is not None:
+            if compression_stats is not None:
+                body_bytes = compression_stats.sent_bytes
+            else:
+                body_bytes = len(kwargs['data']) if isinstance(kwargs.get('data'), bytes) else 0
+            sent_bytes = (len(res.method) + len(str(res.url)) + 11 + headers_size(res.request_info.headers)
+                          + body_bytes)
+            self._record_timing(res_obj, timing, res.method, request_start, headers_received,
+                                sent_bytes, headers_size(response.headers) + len(content))
+        self._log_response(res_obj, payload, method_name)
+        return res_obj
 
+    def _record_timing(self, res_obj, timing: RequestTiming, method: str, request_start: float,
+                       headers_received: float, request_bytes: int, response_bytes: int):
+        finished = time.perf_counter()
+        timing.ttfb_ms = max((headers_received - request_start) * 1000 - timing.setup_ms, 0.0)
+        timing.transfer_ms = (finished - headers_received) * 1000
+        timing.total_ms = (finished - request_start) * 1000
+        timing.request_bytes = request_bytes
+        timing.response_bytes = response_bytes
+        res_obj.timing = timing
+        self.request_metrics.record(method, res_obj.url, timing)
+
+    def run_async(self, aw):
+        # Run a coroutine of send_request_async calls from synchronous tests
+        return run_async(aw, self.async_session_pool)
+
+    def _has_body(self, method: RequestMethod, payload, files) -> bool:
+        return (payload is not None and not files
+                and method in (self.RequestMethod.POST, self.RequestMethod.PUT, self.RequestMethod.PATCH))
+
+    def _compress_payload(self, compression: Union[RequestCompression, str], headers: Dict, payload):
+        # (body, headers, CompressionStats) of a payload sent with compression
+        if isinstance(compression, str):
+            compression = RequestCompression(encoding=ContentEncoding(compression))
+        body, stats = compress_body(payload, compression)
+        if not isinstance(payload, (bytes, bytearray)) and not hasattr(payload, 'read'):
+            headers = self._json_headers(headers)
+        else:
+            headers = dict(headers)
+        if stats.encoding:
+            headers['Content-Encoding'] = stats.encoding
+        logger.debug('request body %s: %d -> %d bytes', stats.encoding or 'uncompressed',
+                     stats.raw_bytes, stats.sent_bytes)
+        return body, headers, stats
+
+    @staticmethod
+    def _json_headers(headers: Dict) -> Dict:
+        # payloads are encoded by json_codec and sent as data=, which unlike json= sets no Content-Type
+        if any(key.lower() == 'content-type' for key in headers):
+            return headers
+        return {**headers, 'Content-Type': 'application/json'}
+
+    def _prepare_request(self, method: RequestMethod, payload, custom_url: str, headers, files):
         _payload = None
 
         if files:
@@ -69,63 +445,61 @@ class Base(object):
         else:
             _headers = headers
 
-        # new request session
-        res = None
-        if res is None:
-            session_res = requests.session()
-
-        if method is self.RequestMethod.GET:
-            res = session_res.get(
-                custom_url, headers=_headers, cookies=cookies, stream=True)
-        elif method is self.RequestMethod.POST:
-            res = session_res.post(
-                custom_url, headers=_headers, cookies=cookies, stream=True, json=_payload, files=files)
-        elif method is self.RequestMethod.PUT:
-            res = session_res.put(custom_url, headers=_headers,
-                                  cookies=cookies, stream=True, json=_payload, files=files)
-        elif method is self.RequestMethod.DELETE:
-            res = session_res.delete(
-                custom_url, headers=_headers, cookies=cookies, stream=True)
-        elif method is self.RequestMethod.PATCH:
-            res = session_res.patch(
-                custom_url, headers=_headers, cookies=cookies, stream=True, json=_payload, files=files)
-        else:
-            res = session_res.put(custom_url, headers=_headers,
-                                  cookies=cookies, stream=True, data=_payload, files=files)
+        return _headers, _payload
 
-        res_obj = self.ResponseObject(res)
+    def _log_response(self, res_obj: ResponseObject, payload, method: str = None):
+        request_log = self.request_log
+        if not request_log.should_log(res_obj.status_code):
+            return
+        if request_log.mode is RequestLogMode.STRUCTURED:
+            request_log.log_structured(res_obj, method, payload)
+            return
 
-        # TODO
         logger.info("\n=============URL=================\n")
-        logger.info(res_obj.url)
+        logger.info('%s', res_obj.url)
         logger.info("\n============Payload==============\n")
-        logger.info(payload)
+        logger.info('%s', payload)
         logger.info("\n============Response=============\n")
-        if len(res.content) < 10000:
-            logger.info(f'status code: {res}\n{res_obj.text}')
+        if isinstance(res_obj, self.StreamResponseObject):
+            logger.info('status code: %s\nStreamed response body, skipped to print.', res_obj.status_code)
+        elif len(res_obj.content) < 10000:
+            logger.info('status code: %s\n%s', res_obj.status_code, res_obj.text)
         else:
             logger.info("Too large response body, skipped to print.")
         logger.info("\n=================================\n")
 
-        if res.status_code == 202:
+        if res_obj.status_code == 202:
             logger.warning(
                 "\n==============Source Not Ready===================\n")
             logger.warning(
                 "return code is 202, source are not ready. please check source status.")
 
-        return res_obj
-
     def json_to_gzip(self, data):
-        bytes_data = bytes(json.dumps(data), encoding='utf-8')
+        bytes_data = json_codec.dumps(data)
         gz_data = gzip.compress(bytes_data, 5)
         return gz_data
 
     def get_specific_parameters(self, testcase_key: str, param_key: TestDataUnitKeys):
         return self.data.data[TestDataUnitKeys.content][testcase_key][param_key]
 
-    def get_testdata_parameters(self, key: TestDataUnitKeys):
-        testcase_name = os.environ.get(
-            'PYTEST_CURRENT_TEST').split(':')[-1].split(' ')[0]
+    def get_testdata_parameters(self, key: TestDataUnitKeys, nodeid: str = None):
+        """Test data of the running test, eg. from a fixture:
+        get_testdata_parameters(TestDataUnitKeys.parameters, request.node.nodeid)
+        Args:
+            nodeid: node id of the test, the current test when None
+        """
+        registry = self.testdata_registry
+        if registry is not None:
+            nodeid = nodeid or nodeid_of_current_test()
+            if nodeid in registry:
+                unit = registry.get(nodeid)
+                return unit[key] if unit is not None else {}
+        # outside a collected session, eg. load_runner.py
+        current_test = os.environ.get('PYTEST_CURRENT_TEST')
+        if current_test is None:
+            logger.info(f'no running test, no test data for {key}')
+            return {}
+        testcase_name = current_test.split(':')[-1].split(' ')[0]
         if testcase_name in self.data.data[TestDataUnitKeys.content].keys():
             return self.data.data[TestDataUnitKeys.content][testcase_name][key]
         else:
@@ -300,6 +674,119 @@ class BaseAssertion:
             cls.log_assert(
                 False, "Assertion Failure, The status code is not 40006, body: {}".format(res.text))
 
+    @classmethod
+    def verify_stream_checksum(cls, res: Base.StreamResponseObject, expected_digest: str, algorithm: str = 'sha256'):
+        act_digest = res.hexdigest(algorithm)
+        cls.log_assert(act_digest == expected_digest.lower(),
+                       "Assertion Failure, {} checksum is not expected. act: {}, exp: {}, url: {}".format(
+                           algorithm, act_digest, expected_digest, res.url))
+
+    @classmethod
+    def verify_stream_byte_count(cls, res: Base.StreamResponseObject, expected_bytes: int):
+        res.consume()
+        cls.log_assert(res.byte_count == expected_bytes,
+                       "Assertion Failure, body size is not expected. act: {}, exp: {}, url: {}".format(
+                           res.byte_count, expected_bytes, res.url))
+
+    @classmethod
+    def verify_stream_line_count(cls, res: Base.StreamResponseObject, expected_lines: int):
+        res.consume()
+        cls.log_assert(res.line_count == expected_lines,
+                       "Assertion Failure, line count is not expected. act: {}, exp: {}, url: {}".format(
+                           res.line_count, expected_lines, res.url))
+
+    @classmethod
+    def verify_latency_under(cls, res: Base.ResponseObject, ms: float):
+        cls.log_assert(res.elapsed_ms <= ms,
+                       "Assertion Failure, latency is over {} ms. act: {:.1f} ms, url: {}".format(
+                           ms, res.elapsed_ms, res.url))
+
+    @classmethod
+    def measure_latency(cls, request_func: Callable, times: int = 20, concurrency: int = 1):
+        """Call request_func `times` times, `concurrency` calls at a time.
+        Args:
+            request_func: controller method returning a ResponseObject (eg. controller.get_user_info)
+        Returns:
+            (LatencyHistogram of the successful calls in ms, number of calls answered with status >= 400 or raising)
+        """
+        histogram = LatencyHistogram()
+        errors = 0
+
+        def _call():
+            start = time.perf_counter()
+            try:
+                res = request_func()
+            except Exception as e:
+                logger.warning(e)
+                return (time.perf_counter() - start) * 1000, True
+            elapsed_ms = getattr(res, 'elapsed_ms', None)
+            if elapsed_ms is None:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+            return elapsed_ms, getattr(res, 'status_code', 0) >= 400
+
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(lambda _: _call(), range(times)))
+        else:
+            results = [_call() for _ in range(times)]
+        for elapsed_ms, failed in results:
+            # a refused or failing call is fast, it must not pull the percentiles down
+            if failed:
+                errors += 1
+            else:
+                histogram.record(elapsed_ms)
+        return histogram, errors
+
+    @classmethod
+    def format_latency_summary(cls, histogram: LatencyHistogram, errors: int = 0) -> str:
+        summary = histogram.summary()
+        return 'n={} errors={} min={:.1f} p50={:.1f} p95={:.1f} p99={:.1f} max={:.1f} (ms)'.format(
+            summary['count'], errors, *(summary[k] or 0 for k in ('min', 'p50', 'p95', 'p99', 'max')))
+
+    @classmethod
+    def verify_latency_percentiles(cls, request_func: Callable, thresholds: Dict = None, times: int = None,
+                                   concurrency: int = None, testsuite_config: TestsuiteConfig = None):
+        """Call request_func repeatedly and assert latency percentiles.
+        Args:
+            request_func: controller method returning a ResponseObject
+            thresholds: ms per percentile, eg. {'p95': 300, 'p99': 800}, as given in the
+                testsuite config `latency` or the test data `expect` block. Optional
+                `times` and `concurrency` keys set the run when not given as arguments,
+                `max_errors` (default 0) or `error_rate` (eg. 0.01) the failed calls tolerated.
+                None takes the `latency` of the running testcase in the testsuite config
+            testsuite_config: looked up when thresholds is None, Base.testsuite_config by default
+        """
+        if thresholds is None:
+            thresholds = cls.get_testcase_latency(testsuite_config or Base.testsuite_config)
+        times = times or thresholds.get('times', 20)
+        concurrency = concurrency or thresholds.get('concurrency', 1)
+        histogram, errors = cls.measure_latency(request_func, times=times, concurrency=concurrency)
+        summary = cls.format_latency_summary(histogram, errors)
+        logger.info('latency of %s: %s', getattr(request_func, '__name__', request_func), summary)
+
+        exceeded = []
+        max_errors = thresholds.get('max_errors')
+        if max_errors is None:
+            max_errors = thresholds['error_rate'] * times if 'error_rate' in thresholds else 0
+        if errors > max_errors:
+            exceeded.append('errors {} > {}'.format(errors, max_errors))
+        for key, limit in thresholds.items():
+            if not (key.startswith('p') and key[1:].replace('.', '', 1).isdigit()):
+                continue
+            actual = histogram.percentile(float(key[1:]))
+            if actual is not None and actual > limit:
+                exceeded.append('{} {:.1f} > {} ms'.format(key, actual, limit))
+        cls.log_assert(not exceeded,
+                       "Assertion Failure, latency check failed: {}. {}".format(', '.join(exceeded), summary))
+
+    @staticmethod
+    def get_testcase_latency(testsuite_config: Optional[TestsuiteConfig]) -> Dict:
+        nodeid = nodeid_of_current_test()
+        testcase = testsuite_config.get_nodeid_testcase(nodeid) if testsuite_config and nodeid else None
+        if testcase is None or not testcase.latency:
+            raise ValueError(f'no latency thresholds given and none configured for {nodeid} in the testsuite config')
+        return testcase.latency
+
     @classmethod
     def verify_expected_return_info(cls, res: Base.ResponseObject, exp_code: int, exp_msg: str = None):
         cls.log_assert(res.status_code == exp_code,
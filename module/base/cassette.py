@@ -0,0 +1,251 @@
+import hashlib
+import io
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from enum import Enum
+from typing import Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.models import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3 import HTTPResponse
+from module import json_codec
+
+# headers which describe the stored body rather than the recorded wire format
+_DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+# compressed body of a recording kept in memory up to this size, spilled to a temp file beyond
+_SPOOL_BYTES = 1024 * 1024
+_COPY_BYTES = 256 * 1024
+
+
+class CassetteMode(str, Enum):
+    OFF = 'off'
+    RECORD = 'record'
+    REPLAY = 'replay'
+
+
+class CassetteMissError(ConnectionError):
+    # replaying a request which was never recorded, raised like a network failure
+    pass
+
+
+class Cassette(object):
+    """Recorded request / response pairs kept in an SQLite file.
+
+    Bodies are stored zlib compressed, requests are looked up by the primary
+    key (request hash, occurrence), so replay stays O(1)-ish however many
+    interactions were recorded. The n-th identical request of a run gets the
+    n-th recorded response, or the last one when fewer were recorded.
+    xdist workers record into the same file, each recording takes the next
+    free occurrence of its request hash.
+    Args:
+        path: sqlite file of the cassette
+        mode: CassetteMode.RECORD or CassetteMode.REPLAY
+    """
+
+    def __init__(self, path: str, mode: CassetteMode) -> None:
+        self.path = path
+        self.mode = CassetteMode(mode)
+        self._seen = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS interactions ('
+                'request_hash TEXT NOT NULL, seq INTEGER NOT NULL, method TEXT NOT NULL, url TEXT NOT NULL, '
+                'status INTEGER NOT NULL, reason TEXT, headers TEXT NOT NULL, body BLOB NOT NULL, '
+                'recorded_at INTEGER NOT NULL, PRIMARY KEY (request_hash, seq))'
+            )
+
+    @staticmethod
+    def request_hash(method: str, url: str, body: Optional[bytes], content_type: str = '') -> str:
+        digest = hashlib.sha256(f'{method.upper()} {url}\n'.encode('utf-8'))
+        # multipart boundaries are random, such bodies can not be part of the key
+        if body and not content_type.startswith('multipart/'):
+            body = body if isinstance(body, bytes) else str(body).encode('utf-8')
+            if 'json' in content_type:
+                # the same key whichever json backend encoded the payload
+                body = json_codec.canonical(body)
+            digest.update(body)
+        return digest.hexdigest()
+
+    def clear(self):
+        # a new recording replaces the previous one, see pytest_sessionstart
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM interactions')
+
+    def _next_seq(self, request_hash: str) -> int:
+        with self._lock:
+            seq = self._seen[request_hash]
+            self._seen[request_hash] += 1
+        return seq
+
+    def record(self, request_hash: str, method: str, url: str, status: int, reason: str,
+               headers: Dict[str, str], body: bytes):
+        self._insert(request_hash, method, url, status, reason, headers, zlib.compress(body))
+
+    def record_compressed(self, request_hash: str, method: str, url: str, status: int, reason: str,
+                          headers: Dict[str, str], spool, size: int):
+        """Record a body compressed while it was read, see _RecordingRaw.
+        Args:
+            spool: file object holding `size` bytes of zlib data, read from its start
+        """
+        spool.seek(0)
+        if not hasattr(self._conn, 'blobopen'):
+            # sqlite3 before python 3.11 only takes the blob in one piece
+            self._insert(request_hash, method, url, status, reason, headers, spool.read())
+            return
+        with self._lock, self._conn:
+            rowid = self._execute_insert(request_hash, method, url, status, reason, headers,
+                                         sqlite3.Binary(b''), zeroblob=size).lastrowid
+            with self._conn.blobopen('interactions', 'body', rowid) as blob:
+                for chunk in iter(lambda: spool.read(_COPY_BYTES), b''):
+                    blob.write(chunk)
+
+    def _insert(self, request_hash: str, method: str, url: str, status: int, reason: str,
+                headers: Dict[str, str], body: bytes):
+        with self._lock, self._conn:
+            self._execute_insert(request_hash, method, url, status, reason, headers, body)
+
+    def _execute_insert(self, request_hash: str, method: str, url: str, status: int, reason: str,
+                        headers: Dict[str, str], body: bytes, zeroblob: Optional[int] = None):
+        # caller holds self._lock
+        stored_headers = {k: v for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS}
+        row = (request_hash, method, url, status, reason, json.dumps(stored_headers), int(time.time()))
+        body_sql, body_args = ('zeroblob(?)', (zeroblob,)) if zeroblob is not None else ('?', (body,))
+        # seq is taken in the insert itself, xdist workers recording into one file never reuse one
+        return self._conn.execute(
+            'INSERT INTO interactions '
+            '(request_hash, seq, method, url, status, reason, headers, recorded_at, body) '
+            f'SELECT ?, COALESCE(MAX(seq) + 1, 0), ?, ?, ?, ?, ?, ?, {body_sql} '
+            'FROM interactions WHERE request_hash = ?', row + body_args + (request_hash,))
+
+    def play(self, request_hash: str, method: str, url: str) -> Tuple[int, str, Dict[str, str], bytes]:
+        seq = self._next_seq(request_hash)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, reason, headers, body FROM interactions '
+                'WHERE request_hash = ? AND seq <= ? ORDER BY seq DESC LIMIT 1', (request_hash, seq)).fetchone()
+        if row is None:
+            raise CassetteMissError(f'{method} {url} is not recorded in cassette {self.path}')
+        status, reason, headers, body = row
+        return status, reason, json.loads(headers), zlib.decompress(body)
+
+    def close(self):
+        self._conn.close()
+
+
+class _RecordingRaw(object):
+    """Tee of a urllib3 response: the decoded body is zlib compressed into a
+    spool file as it is read and recorded once it was read to the end.
+    A body closed before its end is not recorded.
+    """
+
+    def __init__(self, raw, on_complete) -> None:
+        self._raw = raw
+        self._on_complete = on_complete
+        self._compressor = zlib.compressobj()
+        self._spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES)
+        self._size = 0
+        self._recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _feed(self, chunk: bytes):
+        if chunk and not self._recorded:
+            compressed = self._compressor.compress(chunk)
+            self._spool.write(compressed)
+            self._size += len(compressed)
+
+    def _finish(self):
+        if self._recorded:
+            return
+        self._recorded = True
+        tail = self._compressor.flush()
+        self._spool.write(tail)
+        self._on_complete(self._spool, self._size + len(tail))
+        self._spool.close()
+
+    def stream(self, amt: int = 2 ** 16, decode_content: bool = None):
+        # what requests' iter_content reads through
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            self._feed(chunk)
+            yield chunk
+        self._finish()
+
+    def read(self, amt: int = None, *args, **kwargs):
+        data = self._raw.read(amt, *args, **kwargs)
+        self._feed(data)
+        if amt is None or not data:
+            self._finish()
+        return data
+
+    def close(self):
+        self._recorded = True
+        self._spool.close()
+        self._raw.close()
+
+
+def prepare_url(url: str) -> str:
+    # the url as requests sends it, so sync and async calls share recordings
+    prepared = PreparedRequest()
+    prepared.prepare_url(url, None)
+    return prepared.url
+
+
+def build_response(url: str, status: int, reason: str, headers: Dict[str, str], content: bytes) -> Response:
+    response = Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = url
+    response._content = content
+    return response
+
+
+class CassetteAdapter(HTTPAdapter):
+    """Adapter mounted on pooled sessions while a cassette is active.
+
+    Record mode sends through the wrapped adapter and stores the response,
+    replay mode answers from the cassette and never opens a connection.
+    """
+
+    def __init__(self, cassette: Cassette, adapter: HTTPAdapter) -> None:
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        elif body is not None and not isinstance(body, bytes):
+            # file or generator body, only the url identifies it
+            body = None
+        request_hash = self.cassette.request_hash(
+            request.method, request.url, body, request.headers.get('Content-Type', ''))
+
+        if self.cassette.mode is CassetteMode.REPLAY:
+            status, reason, headers, content = self.cassette.play(request_hash, request.method, request.url)
+            raw = HTTPResponse(body=io.BytesIO(content), headers=headers, status=status, reason=reason,
+                               preload_content=False, decode_content=False)
+            return self.build_response(request, raw)
+
+        response = self.adapter.send(request, **kwargs)
+        # recorded while the body is read, a chunk_size download is never held in memory
+        response.raw = _RecordingRaw(response.raw, lambda spool, size: self.cassette.record_compressed(
+            request_hash, request.method, request.url, response.status_code, response.reason,
+            dict(response.headers), spool, size))
+        return response
+
+    def close(self):
+        self.adapter.close()
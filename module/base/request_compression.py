@@ -0,0 +1,119 @@
+import zlib
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterator, Optional, Tuple, Union
+from module import json_codec
+
+
+class ContentEncoding(str, Enum):
+    GZIP = 'gzip'
+    # zlib wrapped deflate, what Content-Encoding: deflate means in HTTP
+    DEFLATE = 'deflate'
+
+
+_WBITS = {
+    ContentEncoding.GZIP: 16 + zlib.MAX_WBITS,
+    ContentEncoding.DEFLATE: zlib.MAX_WBITS
+}
+
+
+@dataclass
+class RequestCompression:
+    """Opt-in request body compression of send_request.
+    Args:
+        encoding: ContentEncoding.GZIP or ContentEncoding.DEFLATE
+        level: zlib level, 5 as json_to_gzip
+        threshold: bodies smaller than this many bytes are sent as they are
+        stream_threshold: bodies from this size on are compressed while being sent,
+            chunk by chunk, instead of into one compressed blob first
+        chunk_size: bytes compressed per chunk when streaming
+    """
+    encoding: ContentEncoding = ContentEncoding.GZIP
+    level: int = 5
+    threshold: int = 1024
+    stream_threshold: int = 8 * 1024 * 1024
+    chunk_size: int = 256 * 1024
+
+    def compressor(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED, _WBITS[ContentEncoding(self.encoding)])
+
+
+@dataclass
+class CompressionStats:
+    # of one request body, sent_bytes of a streamed body is final once it was sent
+    encoding: Optional[str] = None
+    raw_bytes: int = 0
+    sent_bytes: int = 0
+    streamed: bool = False
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.raw_bytes - self.sent_bytes
+
+    @property
+    def ratio(self) -> float:
+        return self.sent_bytes / self.raw_bytes if self.raw_bytes else 1.0
+
+
+def _iter_compressed(body: Union[bytes, memoryview], compression: RequestCompression,
+                     stats: CompressionStats) -> Iterator[bytes]:
+    compressor = compression.compressor()
+    view = memoryview(body)
+    for i in range(0, len(view), compression.chunk_size):
+        chunk = compressor.compress(view[i:i + compression.chunk_size])
+        if chunk:
+            stats.sent_bytes += len(chunk)
+            yield chunk
+    tail = compressor.flush()
+    stats.sent_bytes += len(tail)
+    yield tail
+
+
+def _iter_compressed_file(fileobj, compression: RequestCompression, stats: CompressionStats) -> Iterator[bytes]:
+    compressor = compression.compressor()
+    while True:
+        data = fileobj.read(compression.chunk_size)
+        if not data:
+            break
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        stats.raw_bytes += len(data)
+        chunk = compressor.compress(data)
+        if chunk:
+            stats.sent_bytes += len(chunk)
+            yield chunk
+    tail = compressor.flush()
+    stats.sent_bytes += len(tail)
+    yield tail
+
+
+def compress_body(payload, compression: RequestCompression) -> Tuple[Union[bytes, Iterator[bytes]], CompressionStats]:
+    """Request body for payload and its stats, stats.encoding is None when sent uncompressed.
+    Args:
+        payload: json serializable object, bytes, or a file object which is streamed as it is read
+        compression: RequestCompression
+    """
+    encoding = ContentEncoding(compression.encoding).value
+    if hasattr(payload, 'read'):
+        # size unknown up front, a file is always streamed
+        stats = CompressionStats(encoding=encoding, streamed=True)
+        return _iter_compressed_file(payload, compression, stats), stats
+
+    if isinstance(payload, (bytes, bytearray)):
+        body = bytes(payload)
+    else:
+        # same bytes send_request sends uncompressed
+        body = json_codec.dumps(payload)
+    stats = CompressionStats(raw_bytes=len(body))
+    if len(body) < compression.threshold:
+        stats.sent_bytes = len(body)
+        return body, stats
+
+    stats.encoding = encoding
+    if len(body) >= compression.stream_threshold:
+        stats.streamed = True
+        return _iter_compressed(body, compression, stats), stats
+    compressor = compression.compressor()
+    compressed = compressor.compress(body) + compressor.flush()
+    stats.sent_bytes = len(compressed)
+    return compressed, stats
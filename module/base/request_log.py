@@ -0,0 +1,135 @@
+import itertools
+import logging
+import queue
+from enum import Enum
+from logging.handlers import (
+    QueueHandler,
+    QueueListener
+)
+from typing import Optional
+
+DEFAULT_PREVIEW_BYTES = 1024
+
+
+class RequestLogMode(str, Enum):
+    # banner: the former multi line URL / Payload / Response blocks
+    BANNER = 'banner'
+    # structured: one lazily formatted record per request, fields also in record.request_log
+    STRUCTURED = 'structured'
+    OFF = 'off'
+
+
+def body_preview(res_obj, limit: int) -> str:
+    # only bodies send_request already read, a streamed body is never read for logging
+    content = getattr(res_obj, 'content', None)
+    if not isinstance(content, (bytes, bytearray)):
+        return '<streamed>'
+    preview = content[:limit].decode('utf-8', 'replace')
+    if len(content) > limit:
+        preview += f'... ({len(content)} bytes)'
+    return preview
+
+
+class _LazyPreview(object):
+    # rendered only when a handler formats the record
+    __slots__ = ('res_obj', 'limit')
+
+    def __init__(self, res_obj, limit: int) -> None:
+        self.res_obj = res_obj
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return body_preview(self.res_obj, self.limit)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # QueueHandler.prepare formats in the calling thread, leave it to the listener
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _ForwardHandler(logging.Handler):
+    # hands records to the handlers of the root logger as they are at emit time,
+    # so pytest log_cli and capture handlers still see them
+    def handle(self, record: logging.LogRecord) -> bool:
+        logging.getLogger().handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        pass
+
+
+class RequestLog(object):
+    """How send_request logs its responses.
+
+    Failed (>= 400) and 202 responses are always logged, other responses
+    only 1 in `sample`. With `use_queue` the records of `logger_name` are
+    put on a queue and emitted by a listener thread, so the test thread
+    never waits for handler I/O.
+    Args:
+        mode: RequestLogMode
+        sample: log 1 in N successful responses
+        preview_bytes: max body bytes shown in a structured record
+        logger_name: logger send_request logs with
+        use_queue: emit through QueueHandler / QueueListener, structured mode only
+    """
+
+    def __init__(self,
+                 mode: RequestLogMode = RequestLogMode.BANNER,
+                 sample: int = 1,
+                 preview_bytes: int = DEFAULT_PREVIEW_BYTES,
+                 logger_name: str = 'module.base.base_request',
+                 use_queue: bool = False) -> None:
+        self.mode = RequestLogMode(mode)
+        self.sample = max(sample, 1)
+        self.preview_bytes = preview_bytes
+        self.logger = logging.getLogger(logger_name)
+        self._successes = itertools.count()
+        self._listener: Optional[QueueListener] = None
+        self._queue_handler: Optional[QueueHandler] = None
+        if use_queue and self.mode is RequestLogMode.STRUCTURED:
+            self._start_queue()
+
+    def _start_queue(self):
+        records = queue.SimpleQueue()
+        self._queue_handler = _DeferredQueueHandler(records)
+        self.logger.addHandler(self._queue_handler)
+        self.logger.propagate = False
+        self._listener = QueueListener(records, _ForwardHandler())
+        self._listener.start()
+
+    def stop(self):
+        # flushes records still on the queue
+        if self._listener is None:
+            return
+        self._listener.stop()
+        self.logger.removeHandler(self._queue_handler)
+        self.logger.propagate = True
+        self._listener = None
+        self._queue_handler = None
+
+    @staticmethod
+    def level(status_code: int) -> int:
+        # 202 means the source is not ready yet, send_request always warned about it
+        return logging.WARNING if status_code == 202 else logging.INFO
+
+    def should_log(self, status_code: int) -> bool:
+        if self.mode is RequestLogMode.OFF or not self.logger.isEnabledFor(self.level(status_code)):
+            return False
+        if self.sample == 1 or status_code >= 400 or status_code == 202:
+            return True
+        # itertools.count is atomic under the GIL, no lock for concurrent senders
+        return next(self._successes) % self.sample == 0
+
+    def log_structured(self, res_obj, method: Optional[str], payload):
+        fields = {
+            'method': method,
+            'url': res_obj.url,
+            'status_code': res_obj.status_code,
+            'elapsed_ms': res_obj.elapsed_ms
+        }
+        self.logger.log(self.level(res_obj.status_code), '%s %s -> %s in %.1f ms payload=%s body=%s',
+                        method, res_obj.url, res_obj.status_code, res_obj.elapsed_ms, payload,
+                        _LazyPreview(res_obj, self.preview_bytes), extra={'request_log': fields},
+                        # report the send_request line, not this one
+                        stacklevel=3)
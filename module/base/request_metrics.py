@@ -0,0 +1,196 @@
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from urllib3.connection import (
+    HTTPConnection,
+    HTTPSConnection
+)
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    NewConnectionError
+)
+from module import json_codec
+from module.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# timing of the request the current thread is sending, None when metrics are disabled
+_current = threading.local()
+
+
+class RequestTiming(object):
+    """Where the time of one request went, in milliseconds, plus bytes on each side.
+
+    dns/connect/tls stay 0 when a pooled connection was reused.
+    ttfb is from sending the request until response headers, without connection setup.
+    """
+    __slots__ = ('dns_ms', 'connect_ms', 'tls_ms', 'ttfb_ms', 'transfer_ms', 'total_ms',
+                 'request_bytes', 'response_bytes')
+
+    def __init__(self) -> None:
+        self.dns_ms = 0.0
+        self.connect_ms = 0.0
+        self.tls_ms = 0.0
+        self.ttfb_ms = 0.0
+        self.transfer_ms = 0.0
+        self.total_ms = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    @property
+    def setup_ms(self) -> float:
+        return self.dns_ms + self.connect_ms + self.tls_ms
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def start_timing() -> RequestTiming:
+    timing = RequestTiming()
+    _current.timing = timing
+    return timing
+
+
+def stop_timing():
+    _current.timing = None
+
+
+def current_timing() -> Optional[RequestTiming]:
+    return getattr(_current, 'timing', None)
+
+
+class TimedHTTPConnection(HTTPConnection):
+    # records dns and tcp connect time into the timing of the current request
+
+    def _new_conn(self):
+        timing = current_timing()
+        if timing is None:
+            return super()._new_conn()
+        start = time.perf_counter()
+        try:
+            addresses = [info[4][0] for info in socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)]
+        except socket.gaierror:
+            addresses = []
+        if not addresses:
+            # let urllib3 raise its own resolution error
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timing.dns_ms += (resolved - start) * 1000
+        dns_host = self._dns_host
+        try:
+            # every resolved address in order, as socket.create_connection does (eg. IPv6 then IPv4)
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError):
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = dns_host
+            timing.connect_ms += (time.perf_counter() - resolved) * 1000
+
+
+class TimedHTTPSConnection(HTTPSConnection, TimedHTTPConnection):
+    # tls is what connect() takes on top of dns and tcp connect
+
+    def connect(self):
+        timing = current_timing()
+        if timing is None:
+            return super().connect()
+        start = time.perf_counter()
+        before = timing.dns_ms + timing.connect_ms
+        super().connect()
+        total = (time.perf_counter() - start) * 1000
+        timing.tls_ms += max(total - (timing.dns_ms + timing.connect_ms - before), 0.0)
+
+
+def _payload_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    # streamed or file bodies, size unknown without reading them
+    return 0
+
+
+def headers_size(headers) -> int:
+    # 'Name: value\r\n' per header
+    return sum(len(k) + len(v) + 4 for k, v in headers.items()) if headers else 0
+
+
+def request_size(prepared_request) -> int:
+    return (len(prepared_request.method) + len(prepared_request.url) + 11
+            + headers_size(prepared_request.headers) + _payload_size(prepared_request.body))
+
+
+class _Aggregate(object):
+    __slots__ = ('total', 'phases', 'request_bytes', 'response_bytes')
+
+    def __init__(self) -> None:
+        self.total = LatencyHistogram()
+        self.phases = dict.fromkeys(('dns_ms', 'connect_ms', 'tls_ms', 'ttfb_ms', 'transfer_ms'), 0.0)
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def add(self, timing: RequestTiming):
+        self.total.record(timing.total_ms)
+        for name in self.phases:
+            self.phases[name] += getattr(timing, name)
+        self.request_bytes += timing.request_bytes
+        self.response_bytes += timing.response_bytes
+
+    def as_dict(self) -> Dict:
+        count = self.total.count
+        return {
+            'count': count,
+            'total_ms': self.total.summary(),
+            **{f'mean_{name}': value / count for name, value in self.phases.items()},
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes
+        }
+
+
+class RequestMetrics(object):
+    """Aggregates RequestTiming per test and per endpoint for the session.
+
+    Nothing is kept per request, only histograms and sums, so the
+    footprint depends on the number of tests and endpoints only.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.per_test: Dict[str, _Aggregate] = {}
+        self.per_endpoint: Dict[str, _Aggregate] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint_key(method: str, url: str) -> str:
+        parts = urlsplit(url)
+        return f'{method} {parts.scheme}://{parts.netloc}{parts.path}'
+
+    def record(self, method: str, url: str, timing: RequestTiming):
+        # node id of the running test, eg. testsuite/login/test_login.py::TestLogin::test_git_user_info
+        test = os.environ.get('PYTEST_CURRENT_TEST', '').split(' ')[0]
+        endpoint = self.endpoint_key(method, url)
+        with self._lock:
+            self.per_test.setdefault(test, _Aggregate()).add(timing)
+            self.per_endpoint.setdefault(endpoint, _Aggregate()).add(timing)
+
+    def records(self):
+        for scope, aggregates in (('endpoint', self.per_endpoint), ('test', self.per_test)):
+            for key, aggregate in aggregates.items():
+                yield {'scope': scope, 'key': key, **aggregate.as_dict()}
+
+    def write(self) -> str:
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for record in self.records():
+                f.write(json_codec.dumps_str(record) + '\n')
+        logger.info('request metrics written to %s', self.path)
+        return self.path
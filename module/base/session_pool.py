@@ -0,0 +1,193 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from http.cookiejar import CookiePolicy
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import (
+    HTTPConnectionPool,
+    HTTPSConnectionPool
+)
+from module.base.cassette import (
+    Cassette,
+    CassetteAdapter
+)
+from module.base.request_metrics import (
+    TimedHTTPConnection,
+    TimedHTTPSConnection
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def get_worker_id() -> str:
+    # pytest-xdist exports gw0, gw1 ... to every worker process
+    return os.environ.get('PYTEST_XDIST_WORKER', 'master')
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    opened: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.opened, 0)
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_opened(self):
+        with self._lock:
+            self.opened += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            'requests': self.requests,
+            'opened': self.opened,
+            'reused': self.reused
+        }
+
+
+class _RejectAllCookies(CookiePolicy):
+    # Pooled sessions must not carry Set-Cookie from one test into the next,
+    # cookies are only sent when given explicitly to send_request.
+    netscape = True
+    rfc2965 = False
+    hide_cookie2 = False
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+    def domain_return_ok(self, domain, request):
+        return False
+
+    def path_return_ok(self, path, request):
+        return False
+
+
+def _counting_pool_class(pool_cls, connection_cls, stats: PoolStats):
+    def _new_conn(self):
+        stats.count_opened()
+        return pool_cls._new_conn(self)
+
+    return type(f'Counting{pool_cls.__name__}', (pool_cls,), {
+        '_new_conn': _new_conn,
+        # connections which report dns/connect/tls time when request metrics are on
+        'ConnectionCls': connection_cls
+    })
+
+
+class PooledAdapter(HTTPAdapter):
+    def __init__(self, stats: PoolStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, TimedHTTPConnection, self.stats),
+            'https': _counting_pool_class(HTTPSConnectionPool, TimedHTTPSConnection, self.stats)
+        }
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = self.poolmanager.pool_classes_by_scheme
+        return manager
+
+    def send(self, request, **kwargs):
+        self.stats.count_request()
+        return super().send(request, **kwargs)
+
+
+class SessionPool(object):
+    """Keep-alive requests sessions shared by every Base controller.
+
+    One session is kept per scheme and host, each session keeps up to
+    `pool_maxsize` connections to that host. Sessions belong to the process
+    which created them, so every xdist worker ends up with its own pool.
+    Args:
+        pool_connections: number of urllib3 host pools cached per session
+        pool_maxsize: max connections kept alive per host
+        pool_block: block instead of opening extra connections when the pool is exhausted
+    """
+
+    def __init__(self,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 pool_block: bool = False) -> None:
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.stats = PoolStats()
+        # record / replay interactions instead of only sending them, see --cassette
+        self.cassette: Optional[Cassette] = None
+        self._sessions: Dict[Tuple[str, str], requests.Session] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def configure(self, pool_connections: int = None, pool_maxsize: int = None, pool_block: bool = None,
+                  cassette: Cassette = None):
+        # Only new sessions pick up the settings, so drop the existing ones
+        self.close()
+        self.cassette = cassette
+        if pool_connections is not None:
+            self.pool_connections = pool_connections
+        if pool_maxsize is not None:
+            self.pool_maxsize = pool_maxsize
+        if pool_block is not None:
+            self.pool_block = pool_block
+        return self
+
+    def get_session(self, url: str) -> requests.Session:
+        parts = urlsplit(url or '')
+        key = (parts.scheme, parts.netloc)
+        session = self._sessions.get(key)
+        if session is not None and self._pid == os.getpid():
+            return session
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked worker, sockets of the parent can not be shared
+                self._sessions = {}
+                self.stats = PoolStats()
+                self._pid = os.getpid()
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._new_session()
+                self._sessions[key] = session
+        return session
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        session.cookies.set_policy(_RejectAllCookies())
+        adapter = PooledAdapter(
+            self.stats,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        if self.cassette is not None:
+            adapter = CassetteAdapter(self.cassette, adapter)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+        if sessions:
+            logger.info('session pool (%s) closed, %s', get_worker_id(), self.stats.as_dict())
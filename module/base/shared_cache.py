@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from module.base.session_pool import get_worker_id
+
+try:
+    import fcntl
+except ImportError:
+    # no flock (windows), every worker builds its own artifacts
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_ROOT = os.path.join(tempfile.gettempdir(), 'api-auto-tests-cache')
+
+
+def run_cache_dir() -> Optional[str]:
+    # pytest-xdist exports the same run id to every worker of a run
+    run_id = os.environ.get('PYTEST_XDIST_TESTRUNUID')
+    return os.path.join(CACHE_ROOT, run_id) if run_id and fcntl is not None else None
+
+
+class SharedCache(object):
+    """Session artifacts built once per test run and shared by all xdist workers.
+
+    The first worker asking for a key builds the value while holding an
+    exclusive flock on the key, the other workers block on that lock and then
+    unpickle what it wrote. Values are memoized in the process as well.
+    Without a `root` (not under xdist) it is an in-process cache only.
+    Args:
+        root: cache directory of the run, see run_cache_dir
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root
+        self._values: Dict[str, Any] = {}
+        # one lock per key, a factory may ask for other keys while its own is built
+        self._key_locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    def get_or_create(self, key: str, factory: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Value of key, built by factory in exactly one worker.
+        Args:
+            key: eg. 'auth_token:admin'
+            factory: builds the value, it must be picklable
+            ttl: seconds after which the value is built again, eg. for expiring tokens
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.RLock())
+        with key_lock:
+            entry = self._values.get(key)
+            if entry is not None and (ttl is None or time.time() - entry[0] < ttl):
+                return entry[1]
+            if self.root is None:
+                value = factory()
+            else:
+                value = self._get_or_create_file(key, factory, ttl)
+            self._values[key] = (time.time(), value)
+            return value
+
+    def _get_or_create_file(self, key: str, factory: Callable[[], Any], ttl: Optional[float]) -> Any:
+        path = os.path.join(self.root, hashlib.sha1(key.encode('utf-8')).hexdigest())
+        with open(path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.path.exists(path) and (ttl is None or time.time() - os.path.getmtime(path) < ttl):
+                    with open(path, 'rb') as f:
+                        return pickle.load(f)
+                value = factory()
+                # readers only ever see a complete file
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+                logger.info('%s built %s for the other workers', get_worker_id(), key)
+                return value
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_shared_cache: Optional[SharedCache] = None
+
+
+def shared_cache() -> SharedCache:
+    # one per process, the run id of a worker never changes
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = SharedCache(run_cache_dir())
+    return _shared_cache
+
+
+def prune_cache_dirs(max_age: float = 24 * 3600):
+    # run directories of finished runs, nothing tells the controller the run id
+    if not os.path.isdir(CACHE_ROOT):
+        return
+    now = time.time()
+    for entry in os.scandir(CACHE_ROOT):
+        if entry.is_dir() and now - entry.stat().st_mtime > max_age:
+            shutil.rmtree(entry.path, ignore_errors=True)
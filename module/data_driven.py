@@ -0,0 +1,243 @@
+import csv
+import logging
+import os
+import random
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from module import json_codec
+from module.shard_planner import parse_shard
+from testdata.base.base_testdata import (
+    TestDataUnitKeys,
+    TestDataUnitObject
+)
+
+logger = logging.getLogger(__name__)
+
+# dataset paths are relative to it, pytest's rootdir moves with path-like arguments
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# argument of the test function the DatasetRow is passed as
+DEFAULT_ARGNAME = 'data_row'
+EXPECT_PREFIX = 'expect.'
+PARAMETERS_PREFIX = 'parameters.'
+
+
+def _iter_records(f, csv_quoting: bool) -> Iterator[Tuple[int, bytes]]:
+    # (offset, raw record) of a binary file, a quoted csv field may span lines
+    offset = f.tell()
+    record = b''
+    for line in iter(f.readline, b''):
+        record += line
+        if csv_quoting and record.count(b'"') % 2:
+            continue
+        if record.strip():
+            yield offset, record
+        offset += len(record)
+        record = b''
+    if record.strip():
+        yield offset, record
+
+
+def _cell(value: str):
+    # csv cells are text, numbers / bools / null / json objects are decoded
+    try:
+        return json_codec.loads(value)
+    except ValueError:
+        return value
+
+
+@dataclass
+class DatasetIndex:
+    # byte offset of every row, built with one pass over the file
+    offsets: array
+    header: Optional[List[str]] = None
+    # test ids from the id_field of each row, None when rows are numbered
+    ids: Optional[List[str]] = None
+    mtime: float = 0.0
+
+
+class Dataset(object):
+    """Rows of a jsonl or csv file, read one row at a time.
+
+    Collection only records the byte offset of each row, a row's payload is
+    parsed when its test runs. jsonl rows are objects with `parameters` and
+    `expect` (other keys are taken as parameters when `parameters` is
+    missing). csv columns prefixed `expect.` make up expect, the others
+    (with or without a `parameters.` prefix) the parameters.
+    Args:
+        path: .jsonl or .csv file, relative to the repository root
+        id_field: row field used in the test id, the row number when None
+    """
+
+    def __init__(self, path: str, id_field: Optional[str] = None) -> None:
+        self.path = path
+        self.id_field = id_field
+        self.is_csv = path.endswith('.csv')
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self._index: Optional[DatasetIndex] = None
+        # the running test reads its row for params and again for expect_result
+        self._last: Tuple[int, Optional[TestDataUnitObject]] = (-1, None)
+
+    @property
+    def index(self) -> DatasetIndex:
+        if self._index is None:
+            self._index = self._build_index()
+        return self._index
+
+    def __len__(self) -> int:
+        return len(self.index.offsets)
+
+    def _build_index(self) -> DatasetIndex:
+        index = DatasetIndex(offsets=array('q'), mtime=os.path.getmtime(self.path))
+        if self.id_field is not None:
+            index.ids = []
+        with open(self.path, 'rb') as f:
+            records = _iter_records(f, self.is_csv)
+            if self.is_csv:
+                _, raw_header = next(records, (0, b''))
+                index.header = next(csv.reader([raw_header.decode('utf-8-sig')]), [])
+            for offset, raw in records:
+                index.offsets.append(offset)
+                if index.ids is not None:
+                    # decoded for the id only, the row is not kept
+                    index.ids.append(str(self.decode(raw, index.header).get(self.id_field, len(index.offsets) - 1)))
+        logger.info('dataset %s: %d rows', self.path, len(index.offsets))
+        return index
+
+    def read_raw(self, i: int) -> bytes:
+        with open(self.path, 'rb') as f:
+            f.seek(self.index.offsets[i])
+            return next(_iter_records(f, self.is_csv))[1]
+
+    def decode(self, raw: bytes, header: Optional[List[str]] = None) -> dict:
+        if not self.is_csv:
+            return json_codec.loads(raw)
+        values = next(csv.reader([raw.decode('utf-8')]))
+        return dict(zip(header or self.index.header, values))
+
+    def row_id(self, i: int) -> str:
+        ids = self.index.ids
+        return ids[i] if ids is not None else f'{self.name}-{i}'
+
+    def load(self, i: int) -> TestDataUnitObject:
+        last_i, unit = self._last
+        if last_i == i:
+            return unit
+        row = self.decode(self.read_raw(i))
+        unit = self._csv_unit(row) if self.is_csv else self._jsonl_unit(row)
+        self._last = (i, unit)
+        return unit
+
+    def _jsonl_unit(self, row: dict) -> TestDataUnitObject:
+        expect = row.get(TestDataUnitKeys.expect, {})
+        if TestDataUnitKeys.parameters in row:
+            parameters = row[TestDataUnitKeys.parameters]
+        else:
+            parameters = {k: v for k, v in row.items() if k not in (TestDataUnitKeys.expect, self.id_field)}
+        return TestDataUnitObject(parameters=parameters, expect=expect, addtional={})
+
+    def _csv_unit(self, row: Dict[str, str]) -> TestDataUnitObject:
+        parameters, expect = {}, {}
+        for column, value in row.items():
+            if column == self.id_field:
+                continue
+            if column.startswith(EXPECT_PREFIX):
+                expect[column[len(EXPECT_PREFIX):]] = _cell(value)
+            elif column.startswith(PARAMETERS_PREFIX):
+                parameters[column[len(PARAMETERS_PREFIX):]] = _cell(value)
+            else:
+                parameters[column] = _cell(value)
+        return TestDataUnitObject(parameters=parameters, expect=expect, addtional={})
+
+
+class DatasetRow(Mapping):
+    """TestDataUnitObject of one dataset row, what a dataset test case is parametrized with.
+
+    Holds only the row number, `parameters` / `expect` are read from the
+    file on first access while the case runs.
+    """
+    __slots__ = ('dataset', 'index')
+
+    def __init__(self, dataset: Dataset, index: int) -> None:
+        self.dataset = dataset
+        self.index = index
+
+    @property
+    def parameters(self) -> Dict:
+        return self[TestDataUnitKeys.parameters]
+
+    @property
+    def expect(self) -> Dict:
+        return self[TestDataUnitKeys.expect]
+
+    def __getitem__(self, key: str):
+        return self.dataset.load(self.index)[key]
+
+    def __iter__(self):
+        return iter(self.dataset.load(self.index))
+
+    def __len__(self) -> int:
+        return len(self.dataset.load(self.index))
+
+    def __repr__(self) -> str:
+        return f'DatasetRow({self.dataset.path!r}, {self.index})'
+
+
+# path -> Dataset, tests over the same file share one index
+_datasets: Dict[Tuple[str, Optional[str]], Dataset] = {}
+
+
+def get_dataset(path: str, id_field: Optional[str] = None) -> Dataset:
+    cache_key = (os.path.realpath(path), id_field)
+    dataset = _datasets.get(cache_key)
+    if dataset is None or dataset.index.mtime != os.path.getmtime(path):
+        dataset = _datasets[cache_key] = Dataset(path, id_field)
+    return dataset
+
+
+def parse_sample(value: Union[str, int, float, None]) -> Union[int, float, None]:
+    # "500" keeps 500 rows, "0.1" keeps 10% of them
+    if value is None or value == '':
+        return None
+    value = float(value)
+    if value <= 0:
+        raise ValueError(f'sample {value} must be greater than 0')
+    return value if value < 1 else int(value)
+
+
+def select_rows(count: int, sample: Union[int, float, None] = None, seed: int = 0,
+                shard: Optional[str] = None) -> List[int]:
+    """Row numbers a test is expanded into, the same on every xdist worker / CI node.
+    Args:
+        count: rows in the dataset
+        sample: int keeps that many rows, a float below 1 that fraction of them
+        seed: of the sample, fixed so every process selects the same rows
+        shard: "k/N", keeps every N-th row of the (sampled) rows starting at k
+    """
+    rows = range(count)
+    if sample is not None:
+        rng = random.Random(seed)
+        if isinstance(sample, float):
+            rows = [i for i in rows if rng.random() < sample]
+        elif sample < count:
+            rows = sorted(rng.sample(rows, sample))
+    if shard:
+        index, total = parse_shard(shard)
+        rows = rows[index - 1::total]
+    return list(rows)
+
+
+def parametrize_dataset(metafunc, path: str, argname: str = DEFAULT_ARGNAME, id_field: Optional[str] = None,
+                        sample: Union[int, float, None] = None, seed: int = 0, shard: Optional[str] = None):
+    """Expand a test into one case per dataset row, see pytest.mark.dataset.
+
+    Called from pytest_generate_tests, --dataset_sample and --dataset_shard
+    take precedence over the marker's sample and shard.
+    """
+    config = metafunc.config
+    sample = parse_sample(config.getoption('--dataset_sample', default=None) or sample)
+    shard = config.getoption('--dataset_shard', default=None) or shard
+    dataset = get_dataset(os.path.join(REPO_ROOT, path), id_field)
+    rows = select_rows(len(dataset), sample, seed, shard)
+    metafunc.parametrize(argname, [DatasetRow(dataset, i) for i in rows], ids=[dataset.row_id(i) for i in rows])
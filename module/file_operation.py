@@ -1,7 +1,9 @@
 import os
 import yaml
-import json
 import re
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
+from module import json_codec
 
 
 def read_txt(path):
@@ -23,8 +25,8 @@ def read_yml(path):
 
 
 def read_json(path):
-    with open(path, "r") as f:
-        data = json.load(f)
+    with open(path, "rb") as f:
+        data = json_codec.loads(f.read())
     return data
 
 
@@ -35,7 +37,7 @@ def write_txt(path, data):
 
 def write_json(path, data):
     with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+        f.write(json_codec.dumps_pretty(data))
 
 
 def read_utf8_txt_to_list(path) -> list:
@@ -45,24 +47,116 @@ def read_utf8_txt_to_list(path) -> list:
     return lines
 
 
+# distinct keys remembered by to_snake / to_camel, API responses repeat a small set endlessly
+KEY_CACHE_SIZE = 4096
+
+_CAMEL_BOUNDARY = re.compile('([a-z0-9])([A-Z])')
+_CONTAINERS = (dict, list, tuple)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
 def to_snake(name):
-    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
-
-
-def convert_payload_from_camel_to_snake(data):
-    if isinstance(data, list):
-        new_list = []
-        for iter_data in data:
-            convert_data = convert_payload_from_camel_to_snake(iter_data)
-            new_list.append(convert_data)
-        return new_list
-    elif isinstance(data, dict):
-        new_data = dict()
-        for key, value in data.items():
-            new_key = to_snake(key)
-            value = convert_payload_from_camel_to_snake(value)
-            new_data.update({new_key: value})
-        return new_data
-    elif isinstance(data, (str, int, float)):
+    return _CAMEL_BOUNDARY.sub(r'\1_\2', name).lower()
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def to_camel(name):
+    # inverse of to_snake: only an underscore between a lowercase letter / digit and a
+    # lowercase letter is folded, so _user_id -> _userId, a__b and trailing_ stay as they are
+    chars = []
+    upper_next = False
+    last = len(name) - 1
+    for i, char in enumerate(name):
+        if upper_next:
+            chars.append(char.upper())
+            upper_next = False
+        elif (char == '_' and 0 < i < last and name[i + 1].islower()
+              and chars and (chars[-1].islower() or chars[-1].isdigit())):
+            upper_next = True
+        else:
+            chars.append(char)
+    return ''.join(chars)
+
+
+def convert_keys(data, converter: Callable[[str], str], in_place: bool = False):
+    """Rename the keys of every dict nested in data with converter.
+
+    Walks the document with an explicit stack instead of recursion, so
+    deeply nested payloads never hit the recursion limit. Values other
+    than dict / list (str, numbers, bool, None) are kept as they are,
+    tuples become lists like they would through json.
+    Args:
+        data: decoded json document
+        converter: eg. to_snake or to_camel, it is only called once per distinct key
+        in_place: rename keys of the given dicts instead of building a copy,
+            saves the allocation of every container of large documents
+    """
+    if not isinstance(data, _CONTAINERS):
+        return data
+    # per call memo in front of the lru cache of the converter, a dict hit is cheaper than a call
+    keys = {}
+
+    def convert_key(key):
+        new_key = keys.get(key)
+        if new_key is None:
+            new_key = keys[key] = converter(key) if isinstance(key, str) else key
+        return new_key
+
+    if in_place:
+        if isinstance(data, tuple):
+            data = list(data)
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                items = list(node.items())
+                node.clear()
+                for key, value in items:
+                    if isinstance(value, tuple):
+                        value = list(value)
+                    node[convert_key(key)] = value
+                    if isinstance(value, _CONTAINERS):
+                        stack.append(value)
+            else:
+                for i, value in enumerate(node):
+                    if isinstance(value, tuple):
+                        node[i] = value = list(value)
+                    if isinstance(value, _CONTAINERS):
+                        stack.append(value)
         return data
 
+    root = {} if isinstance(data, dict) else []
+    # (source, copy) pairs, a copy is linked into its parent before it is filled
+    stack = [(data, root)]
+    while stack:
+        source, target = stack.pop()
+        if isinstance(source, dict):
+            for key, value in source.items():
+                if isinstance(value, _CONTAINERS):
+                    child = {} if isinstance(value, dict) else []
+                    stack.append((value, child))
+                    value = child
+                target[convert_key(key)] = value
+        else:
+            append = target.append
+            for value in source:
+                if isinstance(value, _CONTAINERS):
+                    child = {} if isinstance(value, dict) else []
+                    stack.append((value, child))
+                    value = child
+                append(value)
+    return root
+
+
+def iter_convert_keys(items: Iterable, converter: Callable[[str], str], in_place: bool = False) -> Iterator:
+    # converts the elements of a large list one at a time, as they are consumed
+    for item in items:
+        yield convert_keys(item, converter, in_place)
+
+
+def convert_payload_from_camel_to_snake(data, in_place: bool = False):
+    return convert_keys(data, to_snake, in_place)
+
+
+def convert_payload_from_snake_to_camel(data, in_place: bool = False):
+    return convert_keys(data, to_camel, in_place)
@@ -0,0 +1,78 @@
+import math
+from typing import Dict, Iterable, Optional
+
+
+class LatencyHistogram(object):
+    """Fixed memory latency histogram with log spaced buckets.
+
+    Samples are not stored, each one only bumps the counter of its bucket.
+    Bucket bounds grow by `precision` (1% by default), so percentiles are
+    reported within that relative error whatever the sample count.
+    Args:
+        precision: relative width of a bucket, eg. 0.01 for 1%
+        min_value: smallest distinguishable value (ms), lower samples share the first bucket
+    """
+    __slots__ = ('precision', 'min_value', 'count', 'total', 'min', 'max', '_buckets', '_log_base')
+
+    def __init__(self, precision: float = 0.01, min_value: float = 0.001) -> None:
+        self.precision = precision
+        self.min_value = min_value
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._buckets: Dict[int, int] = {}
+        self._log_base = math.log1p(precision)
+
+    def record(self, value: float):
+        index = int(math.log(max(value, self.min_value) / self.min_value) / self._log_base)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def record_many(self, values: Iterable[float]):
+        for value in values:
+            self.record(value)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        return self
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Value at percentile p (0-100), the upper bound of its bucket capped by max."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                upper = self.min_value * math.exp((index + 1) * self._log_base)
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            'count': self.count,
+            'min': self.min,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
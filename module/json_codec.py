@@ -0,0 +1,145 @@
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+logger = logging.getLogger(__name__)
+
+
+class JsonCodec(object):
+    """stdlib json, the fallback every other backend behaves like.
+
+    dumps returns compact utf-8 bytes, non ascii characters unescaped, and
+    raises ValueError for nan / inf with every backend. The bytes are not
+    identical across backends, float exponents differ (orjson 1e16, stdlib
+    1e+16), so anything keyed by a body goes through canonical().
+    """
+    name = 'json'
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+class OrjsonCodec(JsonCodec):
+    name = 'orjson'
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            data = orjson.dumps(obj)
+        except TypeError:
+            # non str dict keys or subclasses orjson refuses, stdlib still takes them
+            return super().dumps(obj)
+        # orjson writes nan / inf as null, stdlib raises, only documents with a null can hide one
+        if b'null' in data and _has_non_finite(obj):
+            return super().dumps(obj)
+        return data
+
+
+class UjsonCodec(JsonCodec):
+    name = 'ujson'
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return ujson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                               reject_bytes=True).encode('utf-8')
+        except OverflowError as e:
+            # nan / inf, raised as ValueError like stdlib
+            raise ValueError(str(e)) from e
+
+
+def _has_non_finite(obj: Any) -> bool:
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, float):
+            if not math.isfinite(node):
+                return True
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+    return False
+
+
+# fastest first
+_CODECS: Dict[str, type] = {}
+if orjson is not None:
+    _CODECS['orjson'] = OrjsonCodec
+if ujson is not None:
+    _CODECS['ujson'] = UjsonCodec
+_CODECS['json'] = JsonCodec
+
+
+def available_codecs() -> List[str]:
+    return list(_CODECS)
+
+
+def set_codec(name: Optional[str] = None) -> JsonCodec:
+    """Select the backend every loads / dumps goes through.
+    Args:
+        name: orjson, ujson or json, None takes the JSON_CODEC environment
+            variable and else the fastest installed one
+    """
+    global codec
+    name = name or os.environ.get('JSON_CODEC') or available_codecs()[0]
+    if name not in _CODECS:
+        logger.warning('json codec %s is not installed, using %s', name, available_codecs()[0])
+        name = available_codecs()[0]
+    codec = _CODECS[name]()
+    return codec
+
+
+codec: JsonCodec = set_codec()
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    return codec.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    # compact utf-8 bytes, see JsonCodec
+    return codec.dumps(obj)
+
+
+def dumps_str(obj: Any) -> str:
+    return codec.dumps(obj).decode('utf-8')
+
+
+def canonical(data: bytes) -> bytes:
+    """Backend independent form of a json body, eg. for cassette keys.
+
+    Bodies which are not json (or compressed) are returned as they are.
+    """
+    try:
+        obj = json.loads(data)
+    except ValueError:
+        return data
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_pretty(obj: Any, indent: int = 4) -> str:
+    # files people read and diff keep the stdlib layout, orjson only indents by 2
+    return json.dumps(obj, ensure_ascii=False, indent=indent)
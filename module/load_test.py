@@ -0,0 +1,177 @@
+import logging
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from module.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoadTarget:
+    # eg. name='Login.get_user_info', func=Login(...).get_user_info
+    name: str
+    func: Callable
+    weight: int = 1
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    errors: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def merge(self, other: 'EndpointStats') -> 'EndpointStats':
+        self.requests += other.requests
+        self.errors += other.errors
+        self.latency.merge(other.latency)
+        return self
+
+
+class RateScheduler(object):
+    """Hands out request start times so all virtual users together keep `rate` req/s.
+
+    The rate ramps up linearly during the first `ramp_up` seconds. Slot n is
+    the time at which the integrated rate reaches n requests, so the ramp
+    sends rate * ramp_up / 2 requests and then `rate` req/s.
+    """
+
+    def __init__(self, rate: float, ramp_up: float, start: float) -> None:
+        self.rate = rate
+        self.ramp_up = max(ramp_up, 0.0)
+        self.start = start
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def current_rate(self, at: float) -> float:
+        if self.ramp_up <= 0:
+            return self.rate
+        return self.rate * min(1.0, max(at - self.start, 0.0) / self.ramp_up)
+
+    def offset(self, n: int) -> float:
+        # inverse of the requests sent until t: rate * t^2 / (2 * ramp_up) during the ramp
+        ramp_requests = self.rate * self.ramp_up / 2
+        if n < ramp_requests:
+            return math.sqrt(2 * self.ramp_up * n / self.rate)
+        return self.ramp_up / 2 + n / self.rate
+
+    def next_slot(self) -> float:
+        with self._lock:
+            slot = self.start + self.offset(self._count)
+            self._count += 1
+            lag = time.perf_counter() - 1.0 - slot
+            if lag > 0:
+                # users fell behind, do not burst more than a second of backlog
+                self.start += lag
+                slot += lag
+        return slot
+
+
+class LoadRunner(object):
+    """Drives virtual users through API controller methods.
+
+    Every user is a thread calling a weighted random target in a loop until
+    `duration` is over. Latency is kept per target in LatencyHistogram, so
+    memory does not grow with the number of requests.
+    Args:
+        targets: controller methods to call
+        users: number of concurrent virtual users
+        duration: seconds of load after the first user started
+        rate: total target requests per second, None runs as fast as users can
+        ramp_up: seconds over which users are started and the rate grows
+    """
+
+    def __init__(self, targets: List[LoadTarget], users: int = 1, duration: float = 60,
+                 rate: Optional[float] = None, ramp_up: float = 0) -> None:
+        self.targets = targets
+        self.users = users
+        self.duration = duration
+        self.rate = rate
+        self.ramp_up = ramp_up
+        self.stats: Dict[str, EndpointStats] = {}
+        self.elapsed = 0.0
+
+    def run(self) -> Dict[str, EndpointStats]:
+        start = time.perf_counter()
+        end = start + self.duration
+        scheduler = RateScheduler(self.rate, self.ramp_up, start) if self.rate else None
+        user_stats: List[Dict[str, EndpointStats]] = [{} for _ in range(self.users)]
+        threads = [
+            threading.Thread(
+                target=self._user_loop,
+                args=(start + self.ramp_up * i / self.users, end, scheduler, user_stats[i]),
+                name=f'virtual-user-{i}',
+                daemon=True
+            )
+            for i in range(self.users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - start
+
+        # each user recorded into its own stats, merge them once at the end
+        self.stats = {}
+        for stats in user_stats:
+            for name, endpoint_stats in stats.items():
+                self.stats.setdefault(name, EndpointStats()).merge(endpoint_stats)
+        return self.stats
+
+    def _user_loop(self, begin: float, end: float, scheduler: Optional[RateScheduler],
+                   stats: Dict[str, EndpointStats]):
+        targets = self.targets
+        weights = [target.weight for target in targets]
+        delay = begin - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        while True:
+            if scheduler:
+                slot = scheduler.next_slot()
+                if slot >= end:
+                    return
+                delay = slot - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            elif time.perf_counter() >= end:
+                return
+
+            target = random.choices(targets, weights)[0] if len(targets) > 1 else targets[0]
+            endpoint_stats = stats.get(target.name)
+            if endpoint_stats is None:
+                endpoint_stats = stats[target.name] = EndpointStats()
+
+            request_start = time.perf_counter()
+            try:
+                response = target.func()
+                failed = getattr(response, 'status_code', 0) >= 400
+            except Exception as e:
+                logger.warning('%s failed: %s', target.name, e)
+                failed = True
+            endpoint_stats.latency.record((time.perf_counter() - request_start) * 1000)
+            endpoint_stats.requests += 1
+            endpoint_stats.errors += failed
+
+    def report(self) -> Dict[str, Dict]:
+        report = {}
+        for name, endpoint_stats in self.stats.items():
+            report[name] = {
+                'requests': endpoint_stats.requests,
+                'errors': endpoint_stats.errors,
+                'rps': endpoint_stats.requests / self.elapsed if self.elapsed else 0.0,
+                **{f'{k}_ms': v for k, v in endpoint_stats.latency.summary().items() if k != 'count'}
+            }
+        return report
+
+    def format_report(self) -> str:
+        lines = [f'{"endpoint":40} {"requests":>9} {"errors":>7} {"rps":>9} '
+                 f'{"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"max ms":>9}']
+        for name, row in self.report().items():
+            lines.append(
+                f'{name:40} {row["requests"]:9d} {row["errors"]:7d} {row["rps"]:9.1f} '
+                f'{row["p50_ms"] or 0:9.1f} {row["p95_ms"] or 0:9.1f} {row["p99_ms"] or 0:9.1f} {row["max_ms"] or 0:9.1f}')
+        return '\n'.join(lines)
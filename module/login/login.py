@@ -14,8 +14,15 @@ class Login(Base):
         self.env_config = env_config
         self.data = test_data
 
-    def get_user_info(self) -> Base.ResponseObject:
+    def _user_info_request(self) -> dict:
+        # request arguments shared by the sync and async variants
         headers = {'Authorization': f'token {self.env_config.git_token}'}
-        response = self.send_request(
-            Base.RequestMethod.GET, headers=headers, custom_url=self.env_config.git_user_url)
+        return dict(method=Base.RequestMethod.GET, headers=headers, custom_url=self.env_config.git_user_url)
+
+    def get_user_info(self) -> Base.ResponseObject:
+        response = self.send_request(**self._user_info_request())
+        return response
+
+    async def get_user_info_async(self) -> Base.ResponseObject:
+        response = await self.send_request_async(**self._user_info_request())
         return response
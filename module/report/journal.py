@@ -0,0 +1,54 @@
+import sqlite3
+import time
+from typing import Iterable, List, Set
+
+# key of steps which run once per run instead of once per result
+RUN_KEY = '*'
+
+
+class UploadJournal(object):
+    """Local record of what a report upload already delivered.
+
+    Every acknowledged write is stored as (run_ts, step, key), where key is
+    the allure result uuid or RUN_KEY. Rerunning the upload for the same run
+    only sends what was not acknowledged yet.
+    Args:
+        path: sqlite file of the journal, created when missing
+        run_ts: timestamp identifying the test run the results belong to
+    """
+
+    def __init__(self, path: str, run_ts: int) -> None:
+        self.path = path
+        self.run_ts = run_ts
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS acks ('
+            'run_ts INTEGER NOT NULL, step TEXT NOT NULL, key TEXT NOT NULL, acked_at INTEGER NOT NULL, '
+            'PRIMARY KEY (run_ts, step, key))'
+        )
+        self._conn.commit()
+
+    def acked(self, step: str) -> Set[str]:
+        cursor = self._conn.execute(
+            'SELECT key FROM acks WHERE run_ts = ? AND step = ?', (self.run_ts, step))
+        return {row[0] for row in cursor}
+
+    def pending(self, step: str, keys: Iterable[str]) -> List[str]:
+        acked = self.acked(step)
+        return [key for key in keys if key not in acked]
+
+    def is_done(self, step: str, key: str = RUN_KEY) -> bool:
+        cursor = self._conn.execute(
+            'SELECT 1 FROM acks WHERE run_ts = ? AND step = ? AND key = ?', (self.run_ts, step, key))
+        return cursor.fetchone() is not None
+
+    def ack(self, step: str, keys: Iterable[str] = (RUN_KEY,)):
+        now = int(time.time())
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO acks (run_ts, step, key, acked_at) VALUES (?, ?, ?, ?)',
+                [(self.run_ts, step, key, now) for key in keys]
+            )
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,26 @@
+from dataclasses import (
+    dataclass,
+    field
+)
+from typing import List
+
+
+@dataclass
+class TestResultObject:
+    name: str = None
+    status: str = None
+    start_time: int = None
+    end_time: int = 0
+    duration: int = 0
+    uuid: str = None
+    testcase_id: str = None
+    full_testcase_name: str = None
+    severity: str = None
+    tags: List[str] = field(default_factory=list)
+    parent_suite: str = None
+    suite: str = None
+    subsuite: str = None
+    host: str = None
+    framework: str = None
+    package: str = None
+    execution_time: int = 0
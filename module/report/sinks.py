@@ -0,0 +1,113 @@
+import abc
+import csv
+import os
+import sqlite3
+from dataclasses import asdict, fields
+from typing import Any, Dict, List
+from module import json_codec
+from module.report.result import TestResultObject
+
+# scalar columns of a result, tags are stored apart since a result has many
+RESULT_COLUMNS = [f.name for f in fields(TestResultObject) if f.name != 'tags']
+
+
+class ResultSink(abc.ABC):
+    """Destination of parsed allure results, eg. Google Sheets or a local file."""
+    name: str = ''
+
+    @abc.abstractmethod
+    def write_results(self, config: Any, result_objs: List[TestResultObject]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteSink(ResultSink):
+    """Keeps the result history in a local SQLite database.
+
+    Results are upserted by uuid in one transaction, so writing a run twice
+    does not duplicate it, and testcase_id / execution_time are indexed for
+    trend queries over months of runs.
+    """
+    name = 'sqlite'
+    default_path = 'reports/results.sqlite'
+
+    def __init__(self, path: str = default_path) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        columns = ', '.join(
+            f'{name} TEXT PRIMARY KEY' if name == 'uuid' else name for name in RESULT_COLUMNS)
+        with self._conn:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS test_results ({columns})')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS test_result_tags (uuid TEXT NOT NULL, tag TEXT NOT NULL, '
+                'PRIMARY KEY (uuid, tag))')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_test_results_testcase_id ON test_results (testcase_id, execution_time)')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_test_results_execution_time ON test_results (execution_time)')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_test_result_tags_tag ON test_result_tags (tag)')
+
+    def write_results(self, config: Any, result_objs: List[TestResultObject]) -> None:
+        placeholders = ', '.join('?' * len(RESULT_COLUMNS))
+        with self._conn:
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO test_results ({", ".join(RESULT_COLUMNS)}) VALUES ({placeholders})',
+                [tuple(getattr(obj, name) for name in RESULT_COLUMNS) for obj in result_objs]
+            )
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO test_result_tags (uuid, tag) VALUES (?, ?)',
+                [(obj.uuid, tag) for obj in result_objs for tag in obj.tags]
+            )
+
+    def history(self, testcase_id: str, limit: int = 100) -> List[Dict]:
+        """Latest results of a testcase, newest first."""
+        cursor = self._conn.execute(
+            f'SELECT {", ".join(RESULT_COLUMNS)} FROM test_results WHERE testcase_id = ? '
+            'ORDER BY execution_time DESC LIMIT ?', (testcase_id, limit))
+        return [dict(zip(RESULT_COLUMNS, row)) for row in cursor]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class JsonlSink(ResultSink):
+    """Appends one JSON object per result."""
+    name = 'jsonl'
+    default_path = 'reports/results.jsonl'
+
+    def __init__(self, path: str = default_path) -> None:
+        self.path = path
+
+    def write_results(self, config: Any, result_objs: List[TestResultObject]) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(json_codec.dumps_str(asdict(obj)) + '\n' for obj in result_objs)
+
+
+class CsvSink(ResultSink):
+    """Appends one row per result, tags joined by ';'."""
+    name = 'csv'
+    default_path = 'reports/results.csv'
+
+    def __init__(self, path: str = default_path) -> None:
+        self.path = path
+
+    def write_results(self, config: Any, result_objs: List[TestResultObject]) -> None:
+        write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if write_header:
+                writer.writerow(RESULT_COLUMNS + ['tags'])
+            writer.writerows(
+                [getattr(obj, name) for name in RESULT_COLUMNS] + [';'.join(obj.tags)] for obj in result_objs)
+
+
+LOCAL_SINKS = {
+    SqliteSink.name: SqliteSink,
+    JsonlSink.name: JsonlSink,
+    CsvSink.name: CsvSink
+}
@@ -1,4 +1,5 @@
 # flake8: noqa: E501
+import allure
 import logging
 import os
 from enum import Enum
@@ -10,10 +11,38 @@ from module.file_operation import (
     read_json
 )
 from configs.env_stg import STG
+from configs.env_local import (
+    LOCAL,
+    stub_routes
+)
 from configs.env_base_config import Base as BaseConfig
 from configs.env_interface import ENV_ENUMS
 from testdata.base.base_testdata import TestData
 from module.base.base_request import Base
+from module.base.session_pool import (
+    SessionPool,
+    get_worker_id
+)
+from module.base.shared_cache import (
+    SharedCache,
+    shared_cache
+)
+from module.base.request_metrics import RequestMetrics
+from module.base.request_log import (
+    DEFAULT_PREVIEW_BYTES,
+    RequestLog,
+    RequestLogMode
+)
+from module.base.cassette import (
+    Cassette,
+    CassetteMode
+)
+from module.stub_server import StubServer
+from module.testsuite_config import (
+    TestsuiteConfig,
+    load_testsuite_config
+)
+from module.testdata_registry import TESTDATA_REGISTRY
 from typing import TypedDict, List
 
 
@@ -32,29 +61,123 @@ class Settings:
     environment: BaseConfig = None
     testsuite_controller: Base = None
     test_data: TestData = None
+    session_pool: SessionPool = None
+    testsuite_config: TestsuiteConfig = None
+    stub_server: StubServer = None
+    shared_cache: SharedCache = None
+    _DEFAULT_ARGS = {
+        'env': "STG",
+        'test_data': None,
+        'testsuite_config': "",
+        'pool_connections': 10,
+        'pool_maxsize': 10,
+        'request_metrics': None,
+        'cassette': CassetteMode.OFF.value,
+        'cassette_path': 'cassettes/cassette.sqlite',
+        'request_log': RequestLogMode.BANNER.value,
+        'request_log_sample': 1,
+        'request_log_preview': DEFAULT_PREVIEW_BYTES
+    }
 
     # ----------------------------------------------------------------------------#
     # initialize logging when doing test base setup
     # ----------------------------------------------------------------------------#
-    def __init__(self, request) -> None:
-        # get custom config from command line args
-        args = {
-            'env': request.config.getoption('--env', default="STG"),
-            'test_data': request.config.getoption('--test_data', default=None),
-            'testsuite_config': request.config.getoption("--testsuite_config", default="")
-        }
-        logging.info('input args: %s', args)
+    def __init__(self, request=None, **options) -> None:
+        if request is not None:
+            # get custom config from command line args
+            args = {
+                key: request.config.getoption(f'--{key}', default=default)
+                for key, default in self._DEFAULT_ARGS.items()
+            }
+        else:
+            # outside pytest, eg. load_runner.py
+            args = {**self._DEFAULT_ARGS, **options}
+        # one Settings per process, so once per xdist worker
+        self.worker_id = get_worker_id()
+        self.shared_cache = shared_cache()
+        logging.info('input args (%s): %s', self.worker_id, args)
+        self.cassette = None
+        if args['cassette'] != CassetteMode.OFF.value:
+            os.makedirs(os.path.dirname(args['cassette_path']) or '.', exist_ok=True)
+            self.cassette = Cassette(args['cassette_path'], CassetteMode(args['cassette']))
+        self.session_pool = Base.session_pool.configure(
+            pool_connections=args['pool_connections'],
+            pool_maxsize=args['pool_maxsize'],
+            cassette=self.cassette
+        )
+        Base.async_session_pool.configure(
+            pool_connections=args['pool_connections'],
+            pool_maxsize=args['pool_maxsize']
+        )
+        # structured records are emitted from a queue listener thread
+        Base.request_log = RequestLog(
+            mode=RequestLogMode(args['request_log']),
+            sample=args['request_log_sample'],
+            preview_bytes=args['request_log_preview'],
+            use_queue=True
+        )
+        if args['request_metrics']:
+            Base.request_metrics = RequestMetrics(self.worker_path(args['request_metrics']))
         self.environment = self.set_env(args['env'])
+        # same cached instance collection used to select testcases
+        if args['testsuite_config']:
+            self.testsuite_config = load_testsuite_config(args['testsuite_config'])
+            Base.testsuite_config = self.testsuite_config
         self.headers = {}
         self.test_data = self.get_testdata(args["test_data"])(
             env_config=self.environment
         )
+        if request is not None and TESTDATA_REGISTRY in request.config.stash:
+            # node id -> test data unit, resolved once for all fixtures
+            Base.testdata_registry = request.config.stash[TESTDATA_REGISTRY]
+            Base.testdata_registry.bind(self.test_data.data)
 
     def set_env(self, env: str = "STG") -> BaseConfig:
         _env = {
-            ENV_ENUMS.STG.value: STG
+            ENV_ENUMS.STG.value: STG,
+            ENV_ENUMS.LOCAL.value: LOCAL
         }
+        if env == ENV_ENUMS.LOCAL.value:
+            return BaseConfig(self.start_stub_server())
         return BaseConfig(_env[env])
 
+    def start_stub_server(self) -> LOCAL:
+        # offline runs, the stand-in server lives as long as the session
+        self.stub_server = StubServer(stub_routes())
+        if LOCAL.STUB_ROUTES:
+            self.stub_server.load_routes(LOCAL.STUB_ROUTES)
+        self.stub_server.start()
+        return LOCAL(GIT_DOMAIN=self.stub_server.netloc)
+
+    def worker_path(self, path: str) -> str:
+        # reports/metrics.jsonl -> reports/metrics.gw0.jsonl, so xdist workers never share a file
+        if self.worker_id == 'master':
+            return path
+        root, ext = os.path.splitext(path)
+        return f'{root}.{self.worker_id}{ext}'
+
+    def get_shared(self, key: str, factory, ttl: float = None):
+        """Session artifact built once for all xdist workers, eg. an auth token:
+        setup.get_shared('auth_token', lambda: login(...).json['token'], ttl=3000)
+        """
+        return self.shared_cache.get_or_create(key, factory, ttl)
+
     def get_testdata(self, path: str) -> TestData:
-        return import_module(f'testdata.{path}/testdata'.replace("/", "."), f'{path}/testdata.py').TestData
+        return import_module(f'testdata.{path.replace("/", ".")}.testdata').TestData
+
+    def teardown(self):
+        logging.info('session pool stats: %s', self.session_pool.stats.as_dict())
+        self.session_pool.close()
+        if self.cassette is not None:
+            self.session_pool.cassette = None
+            self.cassette.close()
+        if Base.request_metrics is not None:
+            path = Base.request_metrics.write()
+            allure.attach.file(path, name='request metrics', attachment_type=allure.attachment_type.TEXT,
+                               extension='jsonl')
+            Base.request_metrics = None
+        Base.request_log.stop()
+        Base.testdata_registry = None
+        Base.testsuite_config = None
+        if self.stub_server is not None:
+            self.stub_server.stop()
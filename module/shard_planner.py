@@ -0,0 +1,123 @@
+import heapq
+import logging
+import sqlite3
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from module.file_operation import read_json, write_json
+from module.report.result import TestResultObject
+
+logger = logging.getLogger(__name__)
+
+# weight of a testcase without history when nothing is known at all
+DEFAULT_DURATION_MS = 1000.0
+
+
+@dataclass
+class Shard:
+    index: int
+    total_ms: float = 0.0
+    testcases: List[str] = field(default_factory=list)
+
+
+def testcase_key(nodeid: str, originalname: str) -> str:
+    """allure fullName of a pytest item, eg. testsuite.login.test_login.TestLogin#test_git_user_info
+
+    Parametrized items share the key of their function, as they do in allure.
+    """
+    path, *parts = nodeid.split('::')
+    package = path[:-3] if path.endswith('.py') else path
+    classes = ''.join(f'.{part}' for part in parts[:-1])
+    return f'{package.replace("/", ".")}{classes}#{originalname}'
+
+
+def estimate_durations(samples: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+    # median per testcase, a single slow or aborted run does not skew it
+    durations = defaultdict(list)
+    for key, duration in samples:
+        if key and duration is not None:
+            durations[key].append(float(duration))
+    return {key: statistics.median(values) for key, values in durations.items()}
+
+
+def samples_from_results(result_objs: Iterable[TestResultObject]) -> Iterable[Tuple[str, float]]:
+    for obj in result_objs:
+        # skipped tests finish at once, they tell nothing about the duration
+        if obj.status != 'skipped':
+            yield obj.full_testcase_name, obj.duration
+
+
+def samples_from_sqlite(path: str, runs: int = 10) -> Iterable[Tuple[str, float]]:
+    # latest `runs` results of each testcase in the SqliteSink history
+    conn = sqlite3.connect(path)
+    try:
+        yield from conn.execute(
+            'SELECT full_testcase_name, duration FROM ('
+            '  SELECT full_testcase_name, duration, ROW_NUMBER() OVER ('
+            '    PARTITION BY full_testcase_name ORDER BY execution_time DESC) AS n'
+            '  FROM test_results WHERE status != ?'
+            ') WHERE n <= ?', ('skipped', runs))
+    finally:
+        conn.close()
+
+
+def default_duration(durations: Dict[str, float]) -> float:
+    return statistics.median(durations.values()) if durations else DEFAULT_DURATION_MS
+
+
+def plan_shards(weights: Dict[str, float], shards: int) -> List[Shard]:
+    """Longest processing time first bin packing.
+
+    Testcases are taken longest first, each goes to the currently lightest
+    shard. Ties are broken by name, so every CI node computes the same plan.
+    """
+    plan = [Shard(index=i + 1) for i in range(shards)]
+    heap = [(0.0, i) for i in range(shards)]
+    for name, weight in sorted(weights.items(), key=lambda kv: (-kv[1], kv[0])):
+        total, i = heapq.heappop(heap)
+        plan[i].testcases.append(name)
+        plan[i].total_ms = total + weight
+        heapq.heappush(heap, (plan[i].total_ms, i))
+    return plan
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    # "k/N", k counts from 1
+    index, _, count = value.partition('/')
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f'shard {value} is not in 1/N..N/N')
+    return index, count
+
+
+def select_shard(items: list, index: int, count: int, durations: Dict[str, float],
+                 default_ms: Optional[float] = None) -> Tuple[list, list]:
+    """Split collected pytest items into (selected, deselected) for shard index of count."""
+    default_ms = default_duration(durations) if default_ms is None else default_ms
+    weights = {
+        item.nodeid: durations.get(testcase_key(item.nodeid, getattr(item, 'originalname', item.name)), default_ms)
+        for item in items
+    }
+    shard = plan_shards(weights, count)[index - 1]
+    logger.info('shard %d/%d: %d of %d tests, estimated %.1fs',
+                index, count, len(shard.testcases), len(items), shard.total_ms / 1000)
+    selected_ids = set(shard.testcases)
+    selected = [item for item in items if item.nodeid in selected_ids]
+    deselected = [item for item in items if item.nodeid not in selected_ids]
+    return selected, deselected
+
+
+def write_plan(path: str, durations: Dict[str, float], shards: List[Shard]):
+    plan = {
+        'default_ms': default_duration(durations),
+        'durations': durations,
+        'shards': [{'index': s.index, 'total_ms': s.total_ms, 'testcases': s.testcases} for s in shards]
+    }
+    write_json(path, plan)
+
+
+def load_plan(path: str) -> Tuple[Dict[str, float], float]:
+    # (durations, default_ms) of a plan written by shard_planner.py
+    plan = read_json(path)
+    return plan['durations'], plan.get('default_ms', DEFAULT_DURATION_MS)
@@ -0,0 +1,289 @@
+import asyncio
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from http import HTTPStatus
+from string import Template
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+from module import json_codec
+
+logger = logging.getLogger(__name__)
+
+# any method matches a route registered with this one
+ANY_METHOD = '*'
+_MAX_HEADER_BYTES = 64 * 1024
+
+
+@dataclass
+class StubRequest:
+    method: str
+    path: str
+    query: str
+    headers: Dict[str, str]
+    body: bytes
+    keep_alive: bool = True
+
+    @property
+    def json(self):
+        return json_codec.loads(self.body) if self.body else None
+
+    def template_vars(self) -> Dict[str, str]:
+        return {
+            'method': self.method,
+            'path': self.path,
+            'query': self.query,
+            'body': self.body.decode('utf-8', 'replace')
+        }
+
+
+class StubRoute(object):
+    """A canned or templated response served by StubServer.
+
+    Args:
+        method: http method, ANY_METHOD matches all of them
+        path: exact path without query string, eg. /user
+        body: bytes and dict / list (sent as json) are canned, a str is a
+            string.Template filled with $method, $path, $query and $body,
+            a callable gets the StubRequest and returns any of those
+        status: response status code
+        headers: extra response headers
+        body_size: repeat body up to this many bytes, for large responses
+        delay: seconds to wait before responding, for slow responses
+        chunk_size: send the body chunked in pieces of this size
+        chunk_delay: seconds to wait between chunks
+    """
+
+    def __init__(self,
+                 method: str,
+                 path: str,
+                 body: Union[bytes, str, dict, list, Callable[[StubRequest], object]] = b'',
+                 status: int = 200,
+                 headers: Optional[Dict[str, str]] = None,
+                 body_size: int = 0,
+                 delay: float = 0,
+                 chunk_size: int = 0,
+                 chunk_delay: float = 0) -> None:
+        self.method = method.upper()
+        self.path = path
+        self.status = status
+        self.headers = dict(headers or {})
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.body = body
+        if isinstance(body, (dict, list)):
+            self.headers.setdefault('Content-Type', 'application/json; charset=utf-8')
+        self._template = Template(body) if isinstance(body, str) else None
+        # whole response built once, static routes only copy it into the socket
+        self._canned = None
+        if not callable(body) and self._template is None:
+            content = self.to_bytes(body, body_size)
+            self._canned = content if chunk_size else self.head(len(content)) + content
+        self.body_size = body_size
+
+    @staticmethod
+    def to_bytes(body, size: int = 0) -> bytes:
+        if isinstance(body, (dict, list)):
+            content = json_codec.dumps(body)
+        elif isinstance(body, str):
+            content = body.encode('utf-8')
+        else:
+            content = bytes(body or b'')
+        if size > len(content):
+            content = (content or b'x') * (size // len(content or b'x') + 1)
+            content = content[:size]
+        return content
+
+    def head(self, content_length: Optional[int]) -> bytes:
+        lines = [f'HTTP/1.1 {self.status} {HTTPStatus(self.status).phrase}']
+        lines.extend(f'{k}: {v}' for k, v in self.headers.items())
+        if content_length is None:
+            lines.append('Transfer-Encoding: chunked')
+        else:
+            lines.append(f'Content-Length: {content_length}')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    def render(self, request: StubRequest) -> bytes:
+        if self._canned is not None:
+            return self._canned
+        if self._template is not None:
+            body = self._template.safe_substitute(request.template_vars())
+        else:
+            body = self.body(request)
+        return self.to_bytes(body, self.body_size)
+
+    async def respond(self, request: StubRequest, writer: asyncio.StreamWriter):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        content = self.render(request)
+        if not self.chunk_size:
+            if content is not self._canned:
+                content = self.head(len(content)) + content
+            writer.write(content)
+            return
+
+        writer.write(self.head(None))
+        for i in range(0, len(content), self.chunk_size):
+            chunk = content[i:i + self.chunk_size]
+            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            await writer.drain()
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+        writer.write(b'0\r\n\r\n')
+
+
+NOT_FOUND = StubRoute(ANY_METHOD, '', {'message': 'Not Found'}, status=404)
+
+
+class StubServer(object):
+    """Local asyncio HTTP/1.1 server standing in for the real API.
+
+    Serves StubRoutes with keep-alive on its own event loop thread, routes are
+    looked up by (method, path) in a dict. Static responses are pre-rendered,
+    so a single server thread serves thousands of requests per second and is
+    not the bottleneck when benchmarking the client side.
+    Args:
+        routes: routes served from the start
+        host: interface to listen on
+        port: 0 picks a free port, see `port` once started
+    """
+
+    def __init__(self, routes: List[StubRoute] = None, host: str = '127.0.0.1', port: int = 0) -> None:
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._routes: Dict[Tuple[str, str], StubRoute] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        for route in routes or []:
+            self.add_route(route)
+
+    @property
+    def netloc(self) -> str:
+        return f'{self.host}:{self.port}'
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.netloc}'
+
+    def add_route(self, route: StubRoute) -> StubRoute:
+        self._routes[(route.method, route.path)] = route
+        return route
+
+    def load_routes(self, path: str):
+        # json list of StubRoute keyword arguments
+        with open(path) as f:
+            for kwargs in json.load(f):
+                self.add_route(StubRoute(**kwargs))
+
+    def match(self, method: str, path: str) -> StubRoute:
+        routes = self._routes
+        return routes.get((method, path)) or routes.get((ANY_METHOD, path)) or NOT_FOUND
+
+    def start(self) -> 'StubServer':
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, limit=_MAX_HEADER_BYTES))
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name='stub-server', daemon=True)
+        self._thread.start()
+        started.wait()
+        logger.info('stub server listening on %s with %d routes', self.url, len(self._routes))
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            # idle keep-alive connections are still waiting for a request
+            handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        logger.info('stub server %s stopped after %d requests', self.url, self.requests)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                self.requests += 1
+                await self.match(request.method, request.path).respond(request, writer)
+                if not request.keep_alive:
+                    break
+                # only wait for the socket when the client is slow to read
+                if writer.transport.get_write_buffer_size() > _MAX_HEADER_BYTES:
+                    await writer.drain()
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            logger.debug('stub server connection dropped: %r', e)
+        except asyncio.CancelledError:
+            # stop() with the connection still open, end quietly rather than as a cancelled task
+            pass
+        except Exception:
+            logger.exception('stub server failed to respond')
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[StubRequest]:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            # client closed the keep-alive connection
+            return None
+        request_line, *header_lines = head[:-4].decode('latin-1').split('\r\n')
+        method, target, version = request_line.split(' ', 2)
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunks.append(await reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            body = b''.join(chunk[:-2] for chunk in chunks)
+        else:
+            length = int(headers.get('content-length') or 0)
+            body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        parts = urlsplit(target)
+        return StubRequest(
+            method=method,
+            path=parts.path,
+            query=parts.query,
+            headers=headers,
+            body=body,
+            keep_alive=connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        )
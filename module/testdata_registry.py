@@ -0,0 +1,117 @@
+import os
+import pytest
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from module.data_driven import DatasetRow
+from module.file_operation import (
+    read_json,
+    read_yml
+)
+from testdata.base.base_testdata import (
+    TestDataObject,
+    TestDataUnitKeys,
+    TestDataUnitObject
+)
+
+# path -> parsed document, a test data file is parsed once per process
+_testdata_files: Dict[str, dict] = {}
+
+
+def read_testdata_file(path: str) -> dict:
+    cache_key = os.path.realpath(path)
+    if cache_key not in _testdata_files:
+        if path.endswith(('.yml', '.yaml')):
+            _testdata_files[cache_key] = read_yml(path)
+        else:
+            _testdata_files[cache_key] = read_json(path)
+    return _testdata_files[cache_key]
+
+
+class LazyTestDataUnit(Mapping):
+    """TestDataUnitObject kept in a json / yaml file, parsed on first access.
+
+    Usable in TestDataObject content like a hand written unit, eg.
+    'test_bulk_import': LazyTestDataUnit('testdata/login/bulk_import.json')
+    Args:
+        path: json or yaml file, relative to the repository root
+        key: unit of a file holding many, eg. {"test_a": {...}, "test_b": {...}};
+            None when the whole file is the unit
+    """
+    __slots__ = ('path', 'key', '_unit')
+
+    def __init__(self, path: str, key: Optional[str] = None) -> None:
+        self.path = path
+        self.key = key
+        self._unit = None
+
+    def _load(self) -> TestDataUnitObject:
+        if self._unit is None:
+            document = read_testdata_file(self.path)
+            self._unit = document[self.key] if self.key is not None else document
+        return self._unit
+
+    def __getitem__(self, key: str):
+        return self._load()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __repr__(self) -> str:
+        return f'LazyTestDataUnit({self.path!r}, {self.key!r})'
+
+
+def nodeid_of_current_test() -> Optional[str]:
+    # "testsuite/login/test_login.py::TestLogin::test_x[case] (call)" -> node id
+    current = os.environ.get('PYTEST_CURRENT_TEST')
+    return current.rsplit(' ', 1)[0] if current else None
+
+
+class TestDataRegistry(object):
+    """pytest node id -> TestDataUnitObject of the collected tests.
+
+    Node ids are registered at collection with the content keys they may
+    use: the item name first, so a parametrized case can have its own unit
+    (test_x[case_1]), then the function name. bind resolves them against
+    the content of the session's test data once, after that a fixture
+    lookup is a single dict hit.
+    """
+
+    def __init__(self) -> None:
+        self._keys: Dict[str, Tuple[str, ...]] = {}
+        self._units: Dict[str, Optional[TestDataUnitObject]] = {}
+        self._rows: Dict[str, DatasetRow] = {}
+
+    def register_items(self, items: Iterable[pytest.Item]):
+        for item in items:
+            callspec = getattr(item, 'callspec', None)
+            row = next((v for v in callspec.params.values() if isinstance(v, DatasetRow)), None) if callspec else None
+            if row is not None:
+                # a dataset case is its own test data, read when it runs
+                self._rows[item.nodeid] = row
+                continue
+            originalname = getattr(item, 'originalname', item.name)
+            self._keys[item.nodeid] = (item.name, originalname) if originalname != item.name else (item.name,)
+
+    def bind(self, data: TestDataObject):
+        content = data[TestDataUnitKeys.content]
+        self._units = {
+            nodeid: next((content[key] for key in keys if key in content), None)
+            for nodeid, keys in self._keys.items()
+        }
+        self._units.update(self._rows)
+
+    def __contains__(self, nodeid: str) -> bool:
+        return nodeid in self._units
+
+    def __len__(self) -> int:
+        return len(self._units)
+
+    def get(self, nodeid: str) -> Optional[TestDataUnitObject]:
+        # None for a test without test data
+        return self._units.get(nodeid)
+
+
+TESTDATA_REGISTRY = pytest.StashKey[TestDataRegistry]()
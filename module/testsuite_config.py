@@ -0,0 +1,93 @@
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+from module.file_operation import read_json
+from module.base.shared_cache import shared_cache
+
+if TYPE_CHECKING:
+    # annotation only, the report CLIs use this module without pytest
+    import pytest
+
+
+@dataclass
+class TestsuiteConfig:
+    @dataclass
+    class metadata_obj:
+        testsuite: str
+        tags: list
+        city_name: str
+        city_id: int
+
+    @dataclass
+    class testcase_obj:
+        name: str = None
+        tags: List[str] = list
+        severity: str = None
+        story: str = None
+        feature: str = None
+        testrail_suite_id: int = 0
+        testrail_case_id: int = 0
+        # latency thresholds in ms, eg. {"p95": 300, "p99": 800}
+        latency: Dict[str, float] = None
+
+    metadata: metadata_obj = None
+    testcases: List[testcase_obj] = list
+    # testcase name -> testcase_obj, built once by load_testsuite_config
+    index: Dict[str, testcase_obj] = None
+
+    def get_testcase(self, name: str) -> Optional[testcase_obj]:
+        return self.index.get(name)
+
+    def get_item_testcase(self, item: 'pytest.Item') -> Optional[testcase_obj]:
+        # parametrized items (test_x[case_1]) fall back to the function name
+        return self.index.get(item.name) or self.index.get(getattr(item, 'originalname', None))
+
+    def get_nodeid_testcase(self, nodeid: str) -> Optional[testcase_obj]:
+        # "testsuite/login/test_login.py::TestLogin::test_x[case_1]", like get_item_testcase
+        name = nodeid.rsplit('::', 1)[-1]
+        return self.index.get(name) or self.index.get(name.split('[', 1)[0])
+
+
+# path -> parsed config, a testsuite config is parsed once per session
+_testsuite_configs: Dict[str, TestsuiteConfig] = {}
+
+
+def load_testsuite_config(path: str) -> TestsuiteConfig:
+    cache_key = os.path.realpath(path)
+    if cache_key not in _testsuite_configs:
+        # under xdist the first worker parses it, the others load its copy
+        _testsuite_configs[cache_key] = shared_cache().get_or_create(
+            f'testsuite_config:{cache_key}', lambda: _parse_testsuite_config(path))
+    return _testsuite_configs[cache_key]
+
+
+def _parse_testsuite_config(path: str) -> TestsuiteConfig:
+    config_json = read_json(path)
+
+    config = TestsuiteConfig(
+        metadata=None,
+        testcases=[]
+    )
+
+    config.metadata = TestsuiteConfig.metadata_obj(
+        testsuite=config_json['metadata']['testsuite_name'],
+        tags=config_json['metadata']['tags'],
+        city_name=config_json['metadata']['city_name'],
+        city_id=config_json['metadata']['city_id']
+    )
+
+    for item in config_json['testcases']:
+        tc = TestsuiteConfig.testcase_obj(
+            name=item['name'],
+            tags=item['tags'],
+            severity=item['severity'],
+            story=item['story'],
+            feature=item['feature'],
+            testrail_suite_id=item['testrail_suite_id'],
+            testrail_case_id=item['testrail_case_id'],
+            latency=item.get('latency')
+        )
+        config.testcases.append(tc)
+
+    config.index = {tc.name: tc for tc in config.testcases}
+    return config
@@ -1,7 +1,13 @@
+import asyncio
 import logging
+import random
 import time
-from typing import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional, Tuple
 from module.base.base_request import Base
+from module.base.async_session import DEFAULT_CONCURRENCY
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +17,7 @@ def polling_response(
         retries_limit: int = 30, step: int = 10) -> Base.ResponseObject:
     """Polling the response from request_fuc and try to meet the matching condition.
     If the condition is not met, try again until retries limit reached.
+    See poll_until for deadline based polling with backoff.
     Args:
         request_func: request function (eg. requests.get)
         request_func_args: request function arguments in tuple (eg. ('http://google.com', ))
@@ -32,3 +39,182 @@ def polling_response(
             f'{retries}/{retries_limit}'
         )
     return response
+
+
+@dataclass
+class PollingPolicy:
+    """How long and how often poll_until asks for a resource.
+    Args:
+        timeout: seconds until the deadline, the last try is made at the deadline
+        interval: delay after the first try
+        max_interval: delay never grows above this
+        backoff: delay multiplier per try
+        jitter: fraction of the delay randomly cut off, so concurrent pollers spread out
+        retry_after: wait as long as the Retry-After header asks instead of the backoff delay
+        conditional: resend the last ETag as If-None-Match, request_func must accept `headers`
+    """
+    timeout: float = 300
+    interval: float = 0.5
+    max_interval: float = 10
+    backoff: float = 2.0
+    jitter: float = 0.5
+    retry_after: bool = True
+    conditional: bool = False
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.max_interval, self.interval * self.backoff ** attempt)
+        return delay * (1 - self.jitter * random.random())
+
+
+def _headers_of(response) -> Dict[str, str]:
+    # ResponseObject keeps them in `header`, requests / aiohttp responses in `headers`
+    headers = getattr(response, 'header', None)
+    return headers if headers is not None else getattr(response, 'headers', None) or {}
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    # Retry-After is either delay seconds or an http date
+    value = _headers_of(response).get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((date - datetime.now(date.tzinfo or timezone.utc)).total_seconds(), 0.0)
+
+
+class _Poller(object):
+    # state of one polled resource, shared by the sync and the asyncio loop
+
+    def __init__(self, condition: Optional[Callable], policy: Optional[PollingPolicy], request_kwargs: Dict) -> None:
+        self.condition = condition
+        self.policy = policy or PollingPolicy()
+        self.request_kwargs = request_kwargs
+        self.start = time.monotonic()
+        self.deadline = self.start + self.policy.timeout
+        self.attempts = 0
+        self.etag = None
+        self.response = None
+        self.ready = False
+
+    def kwargs(self) -> Dict:
+        if self.etag is None:
+            return self.request_kwargs
+        headers = dict(self.request_kwargs.get('headers') or {})
+        headers['If-None-Match'] = self.etag
+        return {**self.request_kwargs, 'headers': headers}
+
+    def observe(self, response) -> Optional[float]:
+        """Take the response of a try, return the delay before the next one or None when done."""
+        self.attempts += 1
+        # 304 means unchanged since the last try, keep the last full response
+        if response.status_code != 304:
+            self.response = response
+            etag = _headers_of(response).get('ETag')
+            if self.policy.conditional and etag:
+                self.etag = etag
+            # 202 Accepted: the job is queued but not done yet
+            if response.status_code != 202 and (self.condition is None or self.condition(response)):
+                self.ready = True
+                return None
+
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        retry_after = retry_after_seconds(response) if self.policy.retry_after else None
+        delay = retry_after if retry_after is not None else self.policy.delay(self.attempts - 1)
+        return min(delay, remaining)
+
+    def log_result(self, name: str):
+        elapsed = time.monotonic() - self.start
+        if self.ready:
+            logger.info('%s ready after %d tries in %.2fs', name, self.attempts, elapsed)
+        else:
+            logger.warning('%s not ready at the %ss deadline, %d tries', name, self.policy.timeout, self.attempts)
+
+
+def poll_until(request_func: Callable, condition: Callable = None, policy: PollingPolicy = None,
+               **request_kwargs) -> Any:
+    """Call request_func until its response meets condition or the deadline passes.
+
+    202 responses are never ready, Retry-After is honored and 304 answers to a
+    conditional try keep the previous response. The last response is returned
+    either way, assert on it as usual.
+    Args:
+        request_func: eg. controller.send_request or controller.get_job_status
+        condition: takes the response, True when ready; None accepts any non 202 response
+        policy: timeout and backoff, PollingPolicy() by default
+        request_kwargs: passed to every request_func call
+    """
+    poller = _Poller(condition, policy, request_kwargs)
+    while True:
+        delay = poller.observe(request_func(**poller.kwargs()))
+        if delay is None:
+            break
+        time.sleep(delay)
+    poller.log_result(getattr(request_func, '__name__', 'request'))
+    return poller.response
+
+
+async def poll_until_async(request_func: Callable[..., Awaitable], condition: Callable = None,
+                           policy: PollingPolicy = None, **request_kwargs) -> Any:
+    """asyncio variant of poll_until, request_func is eg. controller.send_request_async."""
+    return (await _poll(request_func, condition, policy, request_kwargs, None)).response
+
+
+async def _poll(request_func: Callable[..., Awaitable], condition: Optional[Callable],
+                policy: Optional[PollingPolicy], request_kwargs: Dict,
+                semaphore: Optional[asyncio.Semaphore]) -> _Poller:
+    poller = _Poller(condition, policy, request_kwargs)
+    while True:
+        # only in-flight requests count against the limit, not sleeping pollers
+        if semaphore is None:
+            response = await request_func(**poller.kwargs())
+        else:
+            async with semaphore:
+                response = await request_func(**poller.kwargs())
+        delay = poller.observe(response)
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+    poller.log_result(getattr(request_func, '__name__', 'request'))
+    return poller
+
+
+async def iter_ready(request_funcs: Dict[Hashable, Callable[..., Awaitable]], condition: Callable = None,
+                     policy: PollingPolicy = None, limit: int = DEFAULT_CONCURRENCY,
+                     **request_kwargs) -> AsyncIterator[Tuple[Hashable, Any, bool]]:
+    """Poll many resources concurrently, yield (key, response, ready) as each one finishes.
+    Args:
+        request_funcs: key to a coroutine function polling that resource,
+            eg. {job_id: functools.partial(controller.get_job_async, job_id) for job_id in job_ids}
+        condition / policy / request_kwargs: as poll_until, the deadline applies to each resource
+        limit: max number of in-flight requests, default 20
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _keyed(key: Hashable, request_func: Callable[..., Awaitable]):
+        return key, await _poll(request_func, condition, policy, request_kwargs, semaphore)
+
+    tasks = [asyncio.ensure_future(_keyed(key, func)) for key, func in request_funcs.items()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            key, poller = await next_done
+            yield key, poller.response, poller.ready
+    finally:
+        # consumer stopped early or a poll raised
+        for task in tasks:
+            task.cancel()
+
+
+async def poll_many(request_funcs: Dict[Hashable, Callable[..., Awaitable]], condition: Callable = None,
+                    policy: PollingPolicy = None, limit: int = DEFAULT_CONCURRENCY,
+                    **request_kwargs) -> Dict[Hashable, Any]:
+    """iter_ready collected into {key: last response}, in the order resources became ready."""
+    return {key: response async for key, response, _ in iter_ready(
+        request_funcs, condition, policy, limit, **request_kwargs)}
@@ -0,0 +1,62 @@
+import logging
+import os
+from argparse import ArgumentParser
+from itertools import chain
+from typing import Dict, Optional
+from allure_report_parser import (
+    iter_result_files,
+    iter_testcase_results
+)
+from module.report.sinks import SqliteSink
+from module.shard_planner import (
+    estimate_durations,
+    plan_shards,
+    samples_from_results,
+    samples_from_sqlite,
+    write_plan
+)
+
+
+def get_arguments() -> Optional[Dict]:
+    parser = ArgumentParser(description='Plan duration balanced test shards from historical results.')
+    parser.add_argument("--report_path", dest='report_paths', action='append',
+                        help='allure result directory, repeatable (ex: report/allure)')
+    parser.add_argument("--history", dest='history', action='store',
+                        help=f'sqlite result history written by the sqlite sink (ex: {SqliteSink.default_path})')
+    parser.add_argument("--runs", dest='runs', action='store', type=int,
+                        help='latest results per testcase read from the history', default=10)
+    parser.add_argument("--shards", dest='shards', action='store', type=int, required=True,
+                        help='number of CI nodes')
+    parser.add_argument("--workers", dest='workers', action='store', type=int,
+                        help='number of result parsing workers, 1 parses in this process', default=os.cpu_count())
+    parser.add_argument("--output", dest='output', action='store',
+                        help='plan file read by pytest --shard_plan', default="reports/shard_plan.json")
+    args_obj = parser.parse_args()
+    if not args_obj.report_paths and not args_obj.history:
+        parser.error('give --report_path and/or --history')
+    return vars(args_obj)
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)8s] %(message)s')
+
+    samples = []
+    for report_path in args['report_paths'] or []:
+        results = iter_testcase_results(iter_result_files(report_path), workers=args['workers'])
+        samples.append(samples_from_results(results))
+    if args['history']:
+        samples.append(samples_from_sqlite(args['history'], runs=args['runs']))
+    durations = estimate_durations(chain.from_iterable(samples))
+
+    shards = plan_shards(durations, args['shards'])
+    os.makedirs(os.path.dirname(args['output']) or '.', exist_ok=True)
+    write_plan(args['output'], durations, shards)
+
+    mean_ms = sum(s.total_ms for s in shards) / len(shards)
+    print(f'{"shard":>6} {"tests":>7} {"estimated s":>12}')
+    for shard in shards:
+        print(f'{shard.index:>4}/{len(shards)} {len(shard.testcases):7d} {shard.total_ms / 1000:12.1f}')
+    print(f'{len(durations)} testcases, longest shard {max(s.total_ms for s in shards) / mean_ms:.2f}x the mean'
+          if mean_ms else 'no durations found')
+    print(f'plan written to {args["output"]}')
@@ -25,6 +25,28 @@ class TestData(BaseTestData):
                         "login": "GIT_USER_NAME",
                         "id": 0000
                     }
+                ),
+                'test_git_user_info_concurrently': TestDataUnitObject(
+                    parameters={
+                        "requests": 10,
+                        "concurrency": 5
+                    },
+                    expect={
+                        "login": "GIT_USER_NAME",
+                        "id": 0000
+                    }
+                ),
+                'test_git_user_info_latency': TestDataUnitObject(
+                    parameters={
+                        "times": 20,
+                        "concurrency": 4
+                    },
+                    expect={
+                        "latency": {
+                            "p95": 1000,
+                            "p99": 2000
+                        }
+                    }
                 )
             }
         )
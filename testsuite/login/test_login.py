@@ -1,8 +1,12 @@
+import hashlib
 import pytest
 from module.login.login import Login
 from module.base.base_request import Base, BaseAssertion
+from module.base.async_session import gather_with_limit
 from testdata.base.base_testdata import TestDataUnitKeys
 from module.settings import Settings
+from module.stub_server import StubRoute, StubServer
+from module.testsuite_config import load_testsuite_config
 from typing import Optional, Dict
 
 
@@ -17,18 +21,18 @@ def _setup(setup: Settings):
 
 
 @pytest.fixture(scope="function", autouse=True)
-def params(setup: Settings):
+def params(setup: Settings, request):
     # Here is for API parameters or payloads
     params = setup.testsuite_controller.get_testdata_parameters(
-        TestDataUnitKeys.parameters)
+        TestDataUnitKeys.parameters, request.node.nodeid)
     yield params
 
 
 @pytest.fixture(scope="function", autouse=True)
-def expect_result(setup: Settings):
+def expect_result(setup: Settings, request):
     # Here is for API expected results
     expect_result = setup.testsuite_controller.get_testdata_parameters(
-        TestDataUnitKeys.expect)
+        TestDataUnitKeys.expect, request.node.nodeid)
     yield expect_result
 
 
@@ -38,6 +42,45 @@ class TestLogin:
         TestLoginValidation.verify_user_info_is_successful(
             actual_result, expect_result)
 
+    def test_git_user_info_concurrently(self, setup: Settings, params, expect_result):
+        controller: Login = setup.testsuite_controller
+        actual_results = controller.run_async(gather_with_limit(
+            [controller.get_user_info_async() for _ in range(params['requests'])],
+            limit=params['concurrency']))
+        for actual_result in actual_results:
+            TestLoginValidation.verify_user_info_is_successful(
+                actual_result, expect_result)
+
+    def test_git_user_info_latency(self, setup: Settings, params, expect_result):
+        controller: Login = setup.testsuite_controller
+        TestLoginValidation.verify_latency_percentiles(
+            controller.get_user_info, expect_result['latency'],
+            times=params['times'], concurrency=params['concurrency'])
+
+    def test_git_user_info_latency_config(self, setup: Settings):
+        # thresholds and run size come from the testcase's `latency` in the testsuite config
+        controller: Login = setup.testsuite_controller
+        TestLoginValidation.verify_latency_percentiles(
+            controller.get_user_info, testsuite_config=load_testsuite_config('testsuite_configs/login.json'))
+
+    @pytest.mark.dataset('testdata/login/user_info.jsonl', id_field='case')
+    def test_git_user_info_dataset(self, setup: Settings, data_row, params, expect_result):
+        # one case per row, params / expect_result are read from the row when it runs
+        actual_result = setup.testsuite_controller.get_user_info()
+        TestLoginValidation.verify_user_info_is_successful(
+            actual_result, expect_result)
+
+    def test_stream_checksum_md5(self, setup: Settings, stub_server: StubServer):
+        route = stub_server.add_route(StubRoute('GET', '/export', b'row,1,2,3\n', body_size=256 * 1024,
+                                                chunk_size=16 * 1024))
+        res = setup.testsuite_controller.send_request(
+            custom_url=f'{stub_server.url}{route.path}', chunk_size=8 * 1024, hash_algorithms=('sha256', 'md5'))
+        body = StubRoute.to_bytes(route.body, route.body_size)
+        TestLoginValidation.verify_stream_checksum(res, hashlib.md5(body).hexdigest(), algorithm='md5')
+        TestLoginValidation.verify_stream_checksum(res, hashlib.sha256(body).hexdigest())
+        with pytest.raises(ValueError, match='sha1 was not hashed'):
+            res.hexdigest('sha1')
+
 
 class TestLoginValidation(BaseAssertion):
     @classmethod